@@ -0,0 +1,110 @@
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    def __init__(self, process_batch, max_batch_size=64, max_wait=0.002, max_queue=1024):
+        self._process_batch = process_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._max_queue = max_queue
+
+        self._queue = None
+        self._batch_full = None
+        self._task = None
+
+        self._stats = {
+            'batches': 0,
+            'items': 0,
+            'rejected': 0,
+            'errors': 0,
+            'largest_batch': 0
+        }
+
+    async def start(self):
+        if self._task is not None:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._batch_full = asyncio.Event()
+        self._task = asyncio.create_task(self.__run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError('Batcher stopped before the message was processed.'))
+
+    def submit(self, item):
+        # Raises asyncio.QueueFull once max_queue messages are waiting, callers turn that into a 429
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self._stats['rejected'] += 1
+            raise
+
+        if self._queue.qsize() >= self._max_batch_size:
+            self._batch_full.set()
+
+        return future
+
+    async def __collect(self):
+        batch = [await self._queue.get()]
+
+        # Waits for more messages only while the batch is not full, an idle server answers after max_wait at most
+        if self._queue.qsize() < self._max_batch_size - 1 and self._max_wait > 0:
+            self._batch_full.clear()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self._max_wait)
+            except asyncio.TimeoutError:
+                pass
+
+        while len(batch) < self._max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def __run(self):
+        while True:
+            batch = await self.__collect()
+            items = [item for item, _ in batch]
+
+            try:
+                results = await run_in_threadpool(self._process_batch, items)
+            except Exception as e:
+                self._stats['errors'] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+            self._stats['batches'] += 1
+            self._stats['items'] += len(batch)
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+
+    @property
+    def stats(self):
+        return {
+            'max_batch_size': self._max_batch_size,
+            'max_wait': self._max_wait,
+            'max_queue': self._max_queue,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'mean_batch_size': self._stats['items'] / self._stats['batches'] if self._stats['batches'] else 0.0,
+            **self._stats
+        }
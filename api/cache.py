@@ -0,0 +1,144 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+ENTRY_OVERHEAD_BYTES = 120
+
+
+class RedisCacheBackend:
+    def __init__(self, url, namespace='prediction'):
+        if redis is None:
+            raise RuntimeError('The redis package is required for a shared prediction cache.')
+
+        self._client = redis.Redis.from_url(url, protocol=2, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._namespace = namespace
+        self.errors = 0
+
+    def __key(self, version, key):
+        return f'{self._namespace}:{version}:{hashlib.sha1(key.encode("utf-8")).hexdigest()}'
+
+    def get(self, version, key):
+        try:
+            value = self._client.get(self.__key(version, key))
+        except redis.RedisError:
+            self.errors += 1
+            return None
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, version, key, value, ttl):
+        try:
+            self._client.set(self.__key(version, key), value, ex=max(int(ttl), 1))
+        except redis.RedisError:
+            self.errors += 1
+
+
+class PredictionCache:
+    def __init__(self, model_version, max_bytes=64 * 1024 * 1024, ttl=3600, backend=None):
+        self._read_model_version = model_version
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._backend = backend
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._model_version = None
+
+        self._stats = {
+            'hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    def __check_model(self):
+        version = self._read_model_version()
+        if version != self._model_version:
+            if self._model_version is not None:
+                self._stats['invalidations'] += 1
+            self._model_version = version
+            self._entries.clear()
+            self._bytes = 0
+
+    def __entry_size(self, key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+    def __remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __insert(self, key, value, expires_at):
+        if key in self._entries:
+            self.__remove(key)
+
+        size = self.__entry_size(key, value)
+        if size > self._max_bytes:
+            return
+
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+
+        while self._bytes > self._max_bytes:
+            self.__remove(next(iter(self._entries)))
+            self._stats['evictions'] += 1
+
+    def get(self, key):
+        with self._lock:
+            self.__check_model()
+            version = self._model_version
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                self.__remove(key)
+                self._stats['expirations'] += 1
+
+        value = self._backend.get(version, key) if self._backend is not None else None
+
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['shared_hits'] += 1
+            self.__insert(key, value, time.monotonic() + self._ttl)
+
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self.__check_model()
+            version = self._model_version
+            self.__insert(key, value, time.monotonic() + self._ttl)
+
+        if self._backend is not None:
+            self._backend.set(version, key, value, self._ttl)
+
+    @property
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['shared_hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self._max_bytes,
+                'ttl': self._ttl,
+                'model_version': self._model_version,
+                'hit_rate': (self._stats['hits'] + self._stats['shared_hits']) / lookups if lookups else 0.0,
+                'shared_backend': self._backend is not None,
+                'shared_backend_errors': self._backend.errors if self._backend is not None else 0,
+                **self._stats
+            }
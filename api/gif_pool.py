@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import deque
+
+
+class GifPool:
+    def __init__(self, giphy_client, tags, low_watermark=5, high_watermark=20, refill_concurrency=4):
+        self._giphy_client = giphy_client
+        self._low_watermark = low_watermark
+        self._high_watermark = high_watermark
+        self._refill_concurrency = refill_concurrency
+
+        self._buffers = {tag: deque(maxlen=high_watermark) for tag in tags}
+        self._refill_tasks = {}
+        self._stats = {
+            tag: {
+                'served': 0,
+                'fallbacks': 0,
+                'refills': 0,
+                'refilled': 0,
+                'refill_errors': 0,
+                'refill_seconds': 0.0
+            } for tag in tags
+        }
+        self._started_at = None
+
+    async def start(self):
+        self._started_at = time.monotonic()
+        for tag in self._buffers:
+            self.__schedule_refill(tag)
+
+    async def stop(self):
+        tasks = [task for task in self._refill_tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refill_tasks.clear()
+
+    def __schedule_refill(self, tag):
+        task = self._refill_tasks.get(tag)
+        if task is None or task.done():
+            self._refill_tasks[tag] = asyncio.create_task(self.__refill(tag))
+
+    async def __refill(self, tag):
+        buffer = self._buffers[tag]
+        stats = self._stats[tag]
+        start = time.monotonic()
+
+        while len(buffer) < self._high_watermark:
+            batch_size = min(self._high_watermark - len(buffer), self._refill_concurrency)
+            gifs = await asyncio.gather(*[self._giphy_client.get_random(tag) for _ in range(batch_size)])
+            fetched = [gif for gif in gifs if gif is not None]
+
+            buffer.extend(fetched)
+            stats['refilled'] += len(fetched)
+            stats['refill_errors'] += batch_size - len(fetched)
+
+            # Giphy is failing, leave it alone until the next request drains the buffer again
+            if len(fetched) == 0:
+                break
+
+        stats['refills'] += 1
+        stats['refill_seconds'] += time.monotonic() - start
+
+    async def get(self, tag):
+        buffer = self._buffers.get(tag)
+        if buffer is None:
+            return await self._giphy_client.get_random(tag)
+
+        gif = buffer.popleft() if len(buffer) > 0 else None
+
+        if len(buffer) <= self._low_watermark:
+            self.__schedule_refill(tag)
+
+        if gif is None:
+            self._stats[tag]['fallbacks'] += 1
+            return await self._giphy_client.get_random(tag)
+
+        self._stats[tag]['served'] += 1
+        return gif
+
+    @property
+    def stats(self):
+        uptime = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+
+        return {
+            'low_watermark': self._low_watermark,
+            'high_watermark': self._high_watermark,
+            'uptime_seconds': uptime,
+            'tags': {
+                tag: {
+                    'depth': len(self._buffers[tag]),
+                    'refill_rate': stats['refilled'] / uptime if uptime > 0 else 0.0,
+                    **stats
+                } for tag, stats in self._stats.items()
+            }
+        }
@@ -0,0 +1,78 @@
+import asyncio
+import random
+
+import httpx
+
+
+class GiphyClient:
+    def __init__(self, api_url, api_key, timeout=5.0, max_retries=2, backoff=0.1, max_connections=100,
+                 max_concurrency=50, keepalive_expiry=30.0):
+        self._api_url = api_url
+        self._api_key = api_key
+
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._max_connections = max_connections
+        self._max_concurrency = max_concurrency
+        self._keepalive_expiry = keepalive_expiry
+
+        self._client = None
+        self._semaphore = None
+
+    async def start(self):
+        # Created inside the running loop, asyncio primitives are bound to it
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self._timeout),
+            limits=httpx.Limits(
+                max_connections=self._max_connections,
+                max_keepalive_connections=self._max_connections,
+                keepalive_expiry=self._keepalive_expiry
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def __backoff_delay(self, attempt):
+        # Full jitter, so retries from concurrent requests do not hit the server in lockstep
+        return random.uniform(0, self._backoff * 2 ** attempt)
+
+    def __is_retryable(self, r):
+        return r is None or r.status_code == 429 or r.status_code >= 500
+
+    async def __request(self, params):
+        async with self._semaphore:
+            try:
+                return await self._client.get(url=self._api_url, params=params)
+            except httpx.TransportError:
+                return None
+
+    async def get_random(self, tag):
+        if self._client is None:
+            await self.start()
+
+        params = {
+            'api_key': self._api_key,
+            'tag': tag,
+            'rating': 'g'
+        }
+
+        for attempt in range(self._max_retries + 1):
+            r = await self.__request(params)
+
+            if r is not None and r.is_success:
+                try:
+                    return r.json()['data']['embed_url']
+                except (ValueError, KeyError, TypeError):
+                    return None
+
+            if not self.__is_retryable(r) or attempt == self._max_retries:
+                return None
+
+            await asyncio.sleep(self.__backoff_delay(attempt))
+
+        return None
@@ -0,0 +1,55 @@
+# Stand-in for the Giphy random endpoint, used to exercise the API offline:
+#   uvicorn api.giphy_stub:app --port 8001
+#   GIPHY_API_URL=http://127.0.0.1:8001/v1/gifs/random uvicorn api.main:app
+import asyncio
+import itertools
+import os
+import random
+
+from fastapi import FastAPI, Response, status
+
+GIPHY_STUB_LATENCY_MS = float(os.getenv('GIPHY_STUB_LATENCY_MS', 100))
+GIPHY_STUB_JITTER_MS = float(os.getenv('GIPHY_STUB_JITTER_MS', 20))
+GIPHY_STUB_ERROR_RATE = float(os.getenv('GIPHY_STUB_ERROR_RATE', 0))
+
+app = FastAPI()
+
+gif_ids = itertools.count()
+stats = {
+    'requests': 0,
+    'errors': 0,
+    'in_flight': 0,
+    'max_in_flight': 0
+}
+
+
+@app.get("/v1/gifs/random")
+async def random_gif(api_key: str, tag: str, response: Response, rating: str = 'g'):
+    stats['requests'] += 1
+    stats['in_flight'] += 1
+    stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+
+    try:
+        latency = GIPHY_STUB_LATENCY_MS + random.uniform(-GIPHY_STUB_JITTER_MS, GIPHY_STUB_JITTER_MS)
+        await asyncio.sleep(max(latency, 0) / 1000)
+
+        if random.random() < GIPHY_STUB_ERROR_RATE:
+            stats['errors'] += 1
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            return {'meta': {'status': 503, 'msg': 'Stubbed failure.'}}
+
+        gif_id = f'stub{next(gif_ids)}'
+        return {
+            'data': {
+                'id': gif_id,
+                'embed_url': f'https://giphy.com/embed/{gif_id}?tag={tag}&rating={rating}'
+            },
+            'meta': {'status': 200, 'msg': 'OK'}
+        }
+    finally:
+        stats['in_flight'] -= 1
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
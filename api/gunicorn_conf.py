@@ -0,0 +1,23 @@
+# Preloaded serving mode, the master loads the model once and forks workers sharing it copy-on-write:
+#   gunicorn -c api/gunicorn_conf.py api.main:app
+import gc
+import os
+
+bind = os.getenv('API_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('API_WORKERS', os.cpu_count() or 1))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+timeout = int(os.getenv('API_WORKER_TIMEOUT', 60))
+
+# Collections in the master would touch every object header loaded with the model
+gc.disable()
+
+
+def pre_fork(server, worker):
+    # Moves everything allocated so far out of the collector's reach, so the workers' collections do not write to
+    # (and unshare) the pages holding the preloaded model
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
@@ -1,41 +1,235 @@
+from api.startup import StartupProfile
+
+# Created before the heavy imports below, so that they are part of the startup profile
+startup_profile = StartupProfile()
+
+import asyncio
 import os
 import pickle
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
 
-import requests
 from dotenv import load_dotenv
-from fastapi import FastAPI, Response, status
+from fastapi import FastAPI, Header, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.model import UserSubmissionDto, BotResponseDto
-from nlp import TextPreprocessor
+from api.batcher import MicroBatcher
+from api.cache import PredictionCache, RedisCacheBackend
+from api.gif_pool import GifPool
+from api.giphy import GiphyClient
+from api.memory import read_memory_usage
+from api.metrics import Metrics
+from api.registry import ModelRegistry
+from api.shedding import LoadShedder, Overloaded
+from api.model import UserSubmissionDto, BotResponseDto, UserBatchSubmissionDto, BotBatchResponseDto, \
+    UserSocketMessageDto, BotSocketEventDto
+from nlp import ModelArtifact, SpellEngine, TextPreprocessor
+from nlp.TextPreprocessor import token_array
+
+startup_profile.mark('imports')
 
 load_dotenv()
 
-GIPHY_API_URL_RANDOM = 'https://api.giphy.com/v1/gifs/random'
+GIPHY_API_URL_RANDOM = os.getenv('GIPHY_API_URL', 'https://api.giphy.com/v1/gifs/random')
 GIPHY_API_KEY = os.getenv('GIPHY_API_KEY')
 
 if GIPHY_API_KEY is None:
     print('Did not provide Giphy API key.')
     exit(1)
 
+GIPHY_TIMEOUT = float(os.getenv('GIPHY_TIMEOUT', 5.0))
+GIPHY_MAX_RETRIES = int(os.getenv('GIPHY_MAX_RETRIES', 2))
+GIPHY_MAX_CONNECTIONS = int(os.getenv('GIPHY_MAX_CONNECTIONS', 100))
+GIPHY_MAX_CONCURRENCY = int(os.getenv('GIPHY_MAX_CONCURRENCY', 50))
+
+GIF_POOL_ENABLED = os.getenv('GIF_POOL_ENABLED', '1') == '1'
+GIF_POOL_LOW_WATERMARK = int(os.getenv('GIF_POOL_LOW_WATERMARK', 5))
+GIF_POOL_HIGH_WATERMARK = int(os.getenv('GIF_POOL_HIGH_WATERMARK', 20))
+GIF_POOL_REFILL_CONCURRENCY = int(os.getenv('GIF_POOL_REFILL_CONCURRENCY', 4))
+
+PREDICTION_CACHE_ENABLED = os.getenv('PREDICTION_CACHE_ENABLED', '1') == '1'
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv('PREDICTION_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', 3600))
+PREDICTION_CACHE_REDIS_URL = os.getenv('PREDICTION_CACHE_REDIS_URL')
+
+CHAT_BATCH_MAX_SIZE = int(os.getenv('CHAT_BATCH_MAX_SIZE', 5000))
+WS_MAX_IN_FLIGHT = int(os.getenv('WS_MAX_IN_FLIGHT', 32))
+
+MICRO_BATCHING_ENABLED = os.getenv('MICRO_BATCHING_ENABLED', '1') == '1'
+MICRO_BATCH_MAX_SIZE = int(os.getenv('MICRO_BATCH_MAX_SIZE', 64))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', 2))
+MICRO_BATCH_MAX_QUEUE = int(os.getenv('MICRO_BATCH_MAX_QUEUE', 1024))
+
+# Messages that waited past LOAD_SHED_DEGRADE_AFTER_MS, or arrive while more than LOAD_SHED_DEGRADE_QUEUE_DEPTH wait
+# for a prediction, skip spell checking. Past LOAD_SHED_DEADLINE_MS or LOAD_SHED_MAX_QUEUE_DEPTH they get a 503.
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', '1') == '1'
+LOAD_SHED_DEGRADE_QUEUE_DEPTH = int(os.getenv('LOAD_SHED_DEGRADE_QUEUE_DEPTH', 64))
+LOAD_SHED_MAX_QUEUE_DEPTH = int(os.getenv('LOAD_SHED_MAX_QUEUE_DEPTH', 512))
+LOAD_SHED_DEGRADE_AFTER_MS = float(os.getenv('LOAD_SHED_DEGRADE_AFTER_MS', 100))
+LOAD_SHED_DEADLINE_MS = float(os.getenv('LOAD_SHED_DEADLINE_MS', 2000))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', 1))
+
 MODEL_PATH = os.getenv('MODEL_PATH')
+FAST_MODEL_PATH = os.getenv('FAST_MODEL_PATH')
+# 'stack' serves MODEL_PATH, 'fast' serves the linear model exported next to it from FAST_MODEL_PATH
+SERVED_MODEL = os.getenv('SERVED_MODEL', 'stack')
+MODEL_VERIFY_CHECKSUM = os.getenv('MODEL_VERIFY_CHECKSUM', '1') == '1'
+MODEL_ALLOW_PICKLE = os.getenv('MODEL_ALLOW_PICKLE', '1') == '1'
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 0))
+MODEL_HISTORY = int(os.getenv('MODEL_HISTORY', 2))
+MODEL_SMOKE_TEXT = os.getenv('MODEL_SMOKE_TEXT', 'i am so happy today')
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+API_PROFILE_STARTUP = os.getenv('API_PROFILE_STARTUP', '0') == '1'
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_SLOW_REQUEST_MS = os.getenv('METRICS_SLOW_REQUEST_MS')
+METRICS_SLOW_SAMPLE_RATE = float(os.getenv('METRICS_SLOW_SAMPLE_RATE', 1.0))
+METRICS_SLOW_SAMPLE_SIZE = int(os.getenv('METRICS_SLOW_SAMPLE_SIZE', 100))
+
+if SERVED_MODEL == 'fast':
+    MODEL_PATH = FAST_MODEL_PATH
 
 if MODEL_PATH is None:
-    print('Did not provide trained model path.')
+    print(f'Did not provide trained model path for the {SERVED_MODEL} model.')
     exit(1)
 
-save_obj = pickle.load(open(MODEL_PATH, 'rb'))
-model = save_obj['model']
-enc = save_obj['enc']
+SPELL_CACHE_PATH = os.getenv('SPELL_CACHE_PATH')
 
-if model is None or enc is None:
-    print('Invalid trained model data.')
-    exit(1)
+if SPELL_CACHE_PATH is not None:
+    SpellEngine.configure(cache_path=SPELL_CACHE_PATH)
+
+
+def load_model(path):
+    if ModelArtifact.is_artifact(path):
+        artifact = ModelArtifact.load(path, verify=MODEL_VERIFY_CHECKSUM)
+        return artifact.model, artifact.enc, os.path.join(path, ModelArtifact.MANIFEST_FILE)
 
-app = FastAPI()
+    if not MODEL_ALLOW_PICKLE:
+        raise ValueError('Pickled models are disabled, provide an exported model artifact.')
+
+    print('Loading a pickled model, export it as an artifact to avoid unpickling on startup.')
+    save_obj = pickle.load(open(path, 'rb'))
+    return save_obj['model'], save_obj['enc'], path
+
+
+def validate_model(model, enc):
+    if model is None or enc is None:
+        raise ValueError('Invalid trained model data.')
+
+    tag = enc.inverse_transform(model.predict(token_array([text_preprocessor.nlp_tokens(MODEL_SMOKE_TEXT)])))[0]
+
+    if tag not in enc.classes_:
+        raise ValueError(f'Smoke prediction returned unknown label {tag}.')
+
+
+metrics = Metrics(
+    enabled=METRICS_ENABLED,
+    slow_request_seconds=float(METRICS_SLOW_REQUEST_MS) / 1000 if METRICS_SLOW_REQUEST_MS is not None else None,
+    slow_sample_rate=METRICS_SLOW_SAMPLE_RATE,
+    slow_sample_size=METRICS_SLOW_SAMPLE_SIZE
+)
 
 text_preprocessor = TextPreprocessor()
 
+if METRICS_ENABLED:
+    text_preprocessor.set_stage_observer(metrics.observe_stage)
+
+model_registry = ModelRegistry(MODEL_PATH, loader=load_model, validator=validate_model, history=MODEL_HISTORY)
+
+try:
+    model_registry.load()
+except Exception as e:
+    print(f'Could not load trained model: {e}')
+    exit(1)
+
+startup_profile.mark('model load')
+
+prediction_cache = PredictionCache(
+    model_version=lambda: model_registry.current.version,
+    max_bytes=PREDICTION_CACHE_MAX_BYTES,
+    ttl=PREDICTION_CACHE_TTL,
+    backend=RedisCacheBackend(PREDICTION_CACHE_REDIS_URL) if PREDICTION_CACHE_REDIS_URL is not None else None
+) if PREDICTION_CACHE_ENABLED else None
+
+giphy_client = GiphyClient(
+    api_url=GIPHY_API_URL_RANDOM,
+    api_key=GIPHY_API_KEY,
+    timeout=GIPHY_TIMEOUT,
+    max_retries=GIPHY_MAX_RETRIES,
+    max_connections=GIPHY_MAX_CONNECTIONS,
+    max_concurrency=GIPHY_MAX_CONCURRENCY
+)
+
+gif_pool = GifPool(
+    giphy_client=giphy_client,
+    tags=[str(tag) for tag in model_registry.current.enc.classes_],
+    low_watermark=GIF_POOL_LOW_WATERMARK,
+    high_watermark=GIF_POOL_HIGH_WATERMARK,
+    refill_concurrency=GIF_POOL_REFILL_CONCURRENCY
+) if GIF_POOL_ENABLED else None
+
+load_shedder = LoadShedder(
+    degrade_queue_depth=LOAD_SHED_DEGRADE_QUEUE_DEPTH,
+    max_queue_depth=LOAD_SHED_MAX_QUEUE_DEPTH,
+    degrade_after=LOAD_SHED_DEGRADE_AFTER_MS / 1000,
+    deadline=LOAD_SHED_DEADLINE_MS / 1000,
+    retry_after=LOAD_SHED_RETRY_AFTER
+) if LOAD_SHEDDING_ENABLED else None
+
+micro_batcher = MicroBatcher(
+    process_batch=lambda submissions: predict_traced_batch(submissions),
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait=MICRO_BATCH_MAX_WAIT_MS / 1000,
+    max_queue=MICRO_BATCH_MAX_QUEUE
+) if MICRO_BATCHING_ENABLED else None
+
+startup_profile.mark('services')
+
+ready = False
+
+
+def warm_up():
+    # Runs the whole prediction path once so that lazily loaded resources are in place before traffic arrives
+    version = model_registry.current
+    validate_model(version.model, version.enc)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global ready
+
+    await giphy_client.start()
+    if gif_pool is not None:
+        await gif_pool.start()
+    if micro_batcher is not None:
+        await micro_batcher.start()
+    if MODEL_WATCH_INTERVAL > 0:
+        model_registry.start_watching(MODEL_WATCH_INTERVAL)
+    startup_profile.mark('lifespan start')
+
+    await run_in_threadpool(warm_up)
+    startup_profile.mark('warm-up')
+    ready = True
+
+    if API_PROFILE_STARTUP:
+        print(startup_profile.report())
+
+    yield
+    ready = False
+    model_registry.stop_watching()
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    if gif_pool is not None:
+        await gif_pool.stop()
+    await giphy_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -45,41 +239,362 @@ app.add_middleware(
 )
 
 
-def get_giphy_res(tag):
-    params = {
-        'api_key': GIPHY_API_KEY,
-        'tag': tag,
-        'rating': 'g'
-    }
+async def get_giphy_res(tag):
+    if gif_pool is not None:
+        return await gif_pool.get(str(tag))
+    return await giphy_client.get_random(tag)
+
+
+def normalize_batch(texts, degraded, breakdowns):
+    if breakdowns is not None:
+        # Every message is normalized on its own, so that its stage timings can be told apart
+        normalized = []
+        for text, text_degraded in zip(texts, degraded):
+            with metrics.trace() as stages:
+                normalized.extend(text_preprocessor.nlp_batch([text], degraded=text_degraded))
+            breakdowns.append(stages)
+        return normalized
+
+    normalized = [None] * len(texts)
+    for profile_degraded in [False, True]:
+        indices = [i for i, text_degraded in enumerate(degraded) if text_degraded == profile_degraded]
+        for i, tokens in zip(indices, text_preprocessor.nlp_batch([texts[i] for i in indices],
+                                                                  degraded=profile_degraded)):
+            normalized[i] = tokens
+    return normalized
+
+
+def predict_batch(texts, breakdowns=None, degraded=None):
+    normalized = normalize_batch(texts, degraded or [False] * len(texts), breakdowns)
+    # The model takes the token lists, the joined tokens are only the prediction cache key
+    keys = [' '.join(tokens) if tokens is not None else None for tokens in normalized]
+    tags = [None] * len(texts)
+    missing = []
+
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        if prediction_cache is not None:
+            tags[i] = prediction_cache.get(key)
+        if tags[i] is None:
+            missing.append(i)
+
+    if len(missing) > 0:
+        version = model_registry.current
+        started_at = time.perf_counter()
+        predictions = version.model.predict(token_array([normalized[i] for i in missing]))
+        predict_seconds = time.perf_counter() - started_at
+
+        if metrics.enabled:
+            metrics.predict_seconds.observe(predict_seconds)
+            metrics.predict_batch_size.observe(len(missing))
+            for i in missing if breakdowns is not None else []:
+                breakdowns[i]['predict'] = predict_seconds
+
+        for i, tag in zip(missing, version.enc.inverse_transform(predictions)):
+            tags[i] = str(tag)
+            if prediction_cache is not None:
+                prediction_cache.set(keys[i], tags[i])
+
+    return tags
+
+
+def predict_traced_batch(submissions):
+    # Takes (message, started_at) pairs, every tag comes with the per-stage timings of its message (None when
+    # metrics are disabled) and the preprocessing profile it got given how long it had waited
+    now = time.perf_counter()
+    profiles = [load_shedder.profile(now - started_at) if load_shedder is not None else LoadShedder.FULL
+                for _, started_at in submissions]
+    kept = [i for i, profile in enumerate(profiles) if profile != LoadShedder.SHED]
+
+    breakdowns = [] if metrics.enabled else None
+    tags = predict_batch([submissions[i][0] for i in kept], breakdowns,
+                         [profiles[i] == LoadShedder.DEGRADED for i in kept])
+
+    results = [(None, None, profile) for profile in profiles]
+    for j, i in enumerate(kept):
+        results[i] = (tags[j], breakdowns[j] if breakdowns is not None else None, profiles[i])
+    return results
+
 
-    r = requests.get(url=GIPHY_API_URL_RANDOM, params=params)
+async def predict_message(message, started_at):
+    # Raises Overloaded when the message is shed, callers turn that into a 503
+    if load_shedder is not None:
+        load_shedder.admit()
 
-    if not r.ok:
-        return None
+    try:
+        # Concurrent messages are predicted together, one model call per micro-batch
+        if micro_batcher is not None:
+            tag, breakdown, profile = await micro_batcher.submit((message, started_at))
+        else:
+            tag, breakdown, profile = (await run_in_threadpool(predict_traced_batch, [(message, started_at)]))[0]
+    finally:
+        if load_shedder is not None:
+            load_shedder.release()
 
-    data = r.json()
+    if profile == LoadShedder.SHED:
+        raise Overloaded('deadline')
+    if profile == LoadShedder.DEGRADED and tag is not None:
+        metrics.observe_degraded()
 
-    return data['data']['embed_url']
+    return tag, breakdown
 
 
-def predict(text):
-    prediction = model.predict([text_preprocessor.nlp_text(text)])
-    return enc.inverse_transform(prediction)[0]
+async def get_timed_giphy_res(tag, breakdown):
+    if not metrics.enabled:
+        return await get_giphy_res(tag)
 
+    started_at = time.perf_counter()
+    res = await get_giphy_res(tag)
+    giphy_seconds = time.perf_counter() - started_at
 
-def process_request(message):
-    tag = predict(message)
-    gif = get_giphy_res(tag)
-    return gif
+    metrics.giphy_seconds.observe(giphy_seconds)
+    if breakdown is not None:
+        breakdown['giphy'] = giphy_seconds
+
+    return res
 
 
 @app.post("/chat")
 async def submit_chat_message(user_submission_dto: UserSubmissionDto, response: Response) -> BotResponseDto:
     user_message = user_submission_dto.message
-    res = process_request(user_message)
+    started_at = time.perf_counter()
+    breakdown = None
+
+    try:
+        try:
+            tag, breakdown = await predict_message(user_message, started_at)
+        except asyncio.QueueFull:
+            response.status_code = status.HTTP_429_TOO_MANY_REQUESTS
+            return BotResponseDto(error="Too many messages waiting to be processed, try again later.")
+        except Overloaded as e:
+            metrics.observe_shed(e.reason)
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            response.headers['Retry-After'] = str(load_shedder.retry_after)
+            return BotResponseDto(error="Server is overloaded, try again later.")
+
+        if tag is None:
+            response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            return BotResponseDto(error="Error processing message.")
+
+        res = await get_timed_giphy_res(tag, breakdown)
+
+        if res is None:
+            response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            return BotResponseDto(error="Error communicating with Giphy server.")
+
+        return BotResponseDto(data=res)
+    finally:
+        metrics.observe_request(response.status_code or status.HTTP_200_OK, time.perf_counter() - started_at,
+                                user_message, breakdown)
+
+
+async def send_socket_event(websocket, send_lock, **event):
+    try:
+        async with send_lock:
+            await websocket.send_json(BotSocketEventDto(**event).model_dump(exclude_none=True))
+    except (WebSocketDisconnect, RuntimeError):
+        # The client left, there is nobody to tell
+        pass
+
+
+async def answer_socket_message(websocket, send_lock, request_id, user_message):
+    started_at = time.perf_counter()
+    breakdown = None
+    status_code = status.HTTP_200_OK
+
+    try:
+        try:
+            tag, breakdown = await predict_message(user_message, started_at)
+        except asyncio.QueueFull:
+            status_code = status.HTTP_429_TOO_MANY_REQUESTS
+            await send_socket_event(websocket, send_lock, id=request_id, type='error',
+                                    error="Too many messages waiting to be processed, try again later.")
+            return
+        except Overloaded as e:
+            metrics.observe_shed(e.reason)
+            status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            await send_socket_event(websocket, send_lock, id=request_id, type='error',
+                                    error=f"Server is overloaded, try again in {load_shedder.retry_after} seconds.")
+            return
+
+        if tag is None:
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            await send_socket_event(websocket, send_lock, id=request_id, type='error',
+                                    error="Error processing message.")
+            return
+
+        # The emotion is known long before the GIF, the client can show it right away
+        await send_socket_event(websocket, send_lock, id=request_id, type='emotion', emotion=tag)
+        res = await get_timed_giphy_res(tag, breakdown)
+
+        if res is None:
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            await send_socket_event(websocket, send_lock, id=request_id, type='error',
+                                    error="Error communicating with Giphy server.")
+            return
+
+        await send_socket_event(websocket, send_lock, id=request_id, type='gif', data=res)
+    finally:
+        metrics.observe_request(status_code, time.perf_counter() - started_at, user_message, breakdown)
+
+
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    await websocket.accept()
+
+    # Messages are answered concurrently, events carry the client's id since they can arrive out of order
+    send_lock = asyncio.Lock()
+    in_flight = set()
+
+    try:
+        while True:
+            try:
+                submission = UserSocketMessageDto.model_validate_json(await websocket.receive_text())
+            except ValueError:
+                await send_socket_event(websocket, send_lock, type='error',
+                                        error="Expected a JSON object with an id and a message.")
+                continue
+
+            if len(in_flight) >= WS_MAX_IN_FLIGHT:
+                await send_socket_event(websocket, send_lock, id=submission.id, type='error',
+                                        error="Too many messages in flight, try again later.")
+                continue
+
+            task = asyncio.create_task(answer_socket_message(websocket, send_lock, submission.id, submission.message))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+@app.post("/chat/batch")
+def submit_chat_batch(user_batch_submission_dto: UserBatchSubmissionDto, response: Response) -> BotBatchResponseDto:
+    messages = user_batch_submission_dto.messages
+
+    if len(messages) > CHAT_BATCH_MAX_SIZE:
+        response.status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        return BotBatchResponseDto(error=f"Batch exceeds the maximum of {CHAT_BATCH_MAX_SIZE} messages.")
+
+    tags = predict_batch(messages)
+
+    return BotBatchResponseDto(results=[
+        BotResponseDto(data=tag) if tag is not None else BotResponseDto(error="Error processing message.")
+        for tag in tags
+    ])
+
+
+@app.get("/ready")
+async def get_readiness(response: Response):
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return {'ready': ready, 'startup': startup_profile.phases, 'startup_seconds': startup_profile.total}
+
+
+@app.get("/diagnostics/gif-pool")
+async def get_gif_pool_stats(response: Response):
+    if gif_pool is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {'error': 'GIF prefetching is disabled.'}
+
+    return gif_pool.stats
+
+
+@app.get("/diagnostics/cache")
+async def get_cache_stats(response: Response):
+    if prediction_cache is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {'error': 'Prediction caching is disabled.'}
+
+    return prediction_cache.stats
+
+
+@app.get("/diagnostics/batching")
+async def get_batching_stats(response: Response):
+    if micro_batcher is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {'error': 'Micro-batching is disabled.'}
+
+    return micro_batcher.stats
+
+
+@app.get("/diagnostics/load-shedding")
+async def get_load_shedding_stats(response: Response):
+    if load_shedder is None:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {'error': 'Load shedding is disabled.'}
+
+    return load_shedder.stats
+
+
+@app.get("/metrics")
+async def get_metrics(response: Response):
+    if not metrics.enabled:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {'error': 'Metrics are disabled.'}
+
+    return Response(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@app.get("/diagnostics/slow-requests")
+async def get_slow_requests(response: Response):
+    if not metrics.enabled:
+        response.status_code = status.HTTP_404_NOT_FOUND
+        return {'error': 'Metrics are disabled.'}
+
+    return metrics.slow_samples
+
+
+@app.get("/diagnostics/memory")
+async def get_memory_usage():
+    return read_memory_usage()
+
+
+def is_admin(admin_token, response):
+    if ADMIN_TOKEN is None:
+        response.status_code = status.HTTP_403_FORBIDDEN
+        return False
+    if admin_token != ADMIN_TOKEN:
+        response.status_code = status.HTTP_401_UNAUTHORIZED
+        return False
+    return True
+
+
+@app.get("/admin/model")
+async def get_model(response: Response, x_admin_token: Optional[str] = Header(None)):
+    if not is_admin(x_admin_token, response):
+        return {'error': 'Not allowed.'}
+
+    return model_registry.describe()
+
+
+@app.post("/admin/model/reload")
+async def reload_model(response: Response, path: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    if not is_admin(x_admin_token, response):
+        return {'error': 'Not allowed.'}
+
+    ok, message = await run_in_threadpool(model_registry.reload, path)
+
+    if not ok:
+        response.status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+        return {'error': message}
+
+    return {'message': message, **model_registry.describe()}
+
+
+@app.post("/admin/model/rollback")
+async def rollback_model(response: Response, x_admin_token: Optional[str] = Header(None)):
+    if not is_admin(x_admin_token, response):
+        return {'error': 'Not allowed.'}
+
+    ok, message = model_registry.rollback()
 
-    if res is None:
-        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        return BotResponseDto(error="Error communicating with Giphy server.")
+    if not ok:
+        response.status_code = status.HTTP_409_CONFLICT
+        return {'error': message}
 
-    return BotResponseDto(data=res)
+    return {'message': message, **model_registry.describe()}
@@ -0,0 +1,52 @@
+import os
+
+SMAPS_ROLLUP_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Shared_Clean': 'shared_clean',
+    'Shared_Dirty': 'shared_dirty',
+    'Private_Clean': 'private_clean',
+    'Private_Dirty': 'private_dirty'
+}
+
+
+def read_smaps_rollup(pid='self'):
+    usage = {}
+
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[0].rstrip(':') in SMAPS_ROLLUP_FIELDS:
+                usage[SMAPS_ROLLUP_FIELDS[parts[0].rstrip(':')]] = int(parts[1]) * 1024
+
+    return usage
+
+
+def read_statm(pid='self'):
+    page_size = os.sysconf('SC_PAGE_SIZE')
+
+    with open(f'/proc/{pid}/statm', 'r') as f:
+        _, resident, shared = [int(value) for value in f.read().split()[:3]]
+
+    return {
+        'rss': resident * page_size,
+        'shared': shared * page_size
+    }
+
+
+def read_memory_usage():
+    # Pss splits shared pages between the processes mapping them, summed over workers it is the real footprint
+    usage = {
+        'pid': os.getpid(),
+        'ppid': os.getppid()
+    }
+
+    try:
+        usage.update(read_smaps_rollup())
+    except OSError:
+        try:
+            usage.update(read_statm())
+        except OSError:
+            pass
+
+    return usage
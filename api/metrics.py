@@ -0,0 +1,154 @@
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+STAGE_BUCKETS = [0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1]
+LENGTH_BUCKETS = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+BATCH_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if len(pairs) == 0:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self._labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{format_labels(self._labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, description, buckets, labels=()):
+        self.name = name
+        self.description = description
+        self._buckets = buckets
+        self._labels = labels
+        # Per label set: a count per bucket (plus +Inf), the sum and the total count
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self._buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self._buckets + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self._labels, label_values, ('le', bound))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = format_labels(self._labels, label_values)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Metrics:
+    def __init__(self, enabled=True, slow_request_seconds=None, slow_sample_rate=1.0, slow_sample_size=100):
+        self.enabled = enabled
+        self._slow_request_seconds = slow_request_seconds
+        self._slow_sample_rate = slow_sample_rate
+        self._slow_samples = deque(maxlen=slow_sample_size)
+        self._trace = threading.local()
+
+        self.requests = Counter('chat_requests_total', 'Chat requests by response status.', ('status',))
+        self.request_seconds = Histogram('chat_request_seconds', 'Chat request latency.', LATENCY_BUCKETS)
+        self.message_length = Histogram('chat_message_length_chars', 'Chat message length.', LENGTH_BUCKETS)
+        self.stage_seconds = Histogram('preprocess_stage_seconds', 'Time spent in each preprocessing stage.',
+                                       STAGE_BUCKETS, ('stage',))
+        self.predict_seconds = Histogram('model_predict_seconds', 'Time spent in one model.predict call.',
+                                         LATENCY_BUCKETS)
+        self.predict_batch_size = Histogram('model_predict_batch_size', 'Messages per model.predict call.',
+                                            BATCH_BUCKETS)
+        self.giphy_seconds = Histogram('giphy_seconds', 'Time spent getting a GIF, from the pool or Giphy.',
+                                       LATENCY_BUCKETS)
+        self.degraded_predictions = Counter('chat_degraded_predictions_total',
+                                            'Chat predictions made with the degraded preprocessing profile.')
+        self.shed_requests = Counter('chat_shed_requests_total', 'Chat messages shed with a 503, by reason.',
+                                     ('reason',))
+
+        self._metrics = [self.requests, self.request_seconds, self.message_length, self.stage_seconds,
+                         self.predict_seconds, self.predict_batch_size, self.giphy_seconds, self.degraded_predictions,
+                         self.shed_requests]
+
+    @contextmanager
+    def trace(self):
+        # Stages observed on this thread inside the block are also collected for the current message
+        stages = {}
+        self._trace.stages = stages
+        try:
+            yield stages
+        finally:
+            self._trace.stages = None
+
+    def observe_stage(self, stage, seconds):
+        self.stage_seconds.observe(seconds, stage)
+        stages = getattr(self._trace, 'stages', None)
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def observe_request(self, status_code, seconds, message, breakdown=None):
+        if not self.enabled:
+            return
+
+        self.requests.inc(str(status_code))
+        self.request_seconds.observe(seconds)
+        self.message_length.observe(len(message))
+
+        if self._slow_request_seconds is not None and seconds >= self._slow_request_seconds and \
+                random.random() < self._slow_sample_rate:
+            self._slow_samples.append({
+                'at': time.time(),
+                'status': status_code,
+                'seconds': seconds,
+                'message_length': len(message),
+                'breakdown': breakdown or {}
+            })
+
+    def observe_degraded(self):
+        if self.enabled:
+            self.degraded_predictions.inc()
+
+    def observe_shed(self, reason):
+        if self.enabled:
+            self.shed_requests.inc(reason)
+
+    @property
+    def slow_samples(self):
+        return list(self._slow_samples)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -10,3 +10,25 @@ class UserSubmissionDto(BaseModel):
 class BotResponseDto(BaseModel):
     data: Optional[str] = Field(None, description="Response data, if valid.")
     error: Optional[str] = Field(None, description="Response error, if invalid.")
+
+
+class UserBatchSubmissionDto(BaseModel):
+    messages: List[str]
+
+
+class BotBatchResponseDto(BaseModel):
+    results: List[BotResponseDto] = Field([], description="Per-message responses, in submission order.")
+    error: Optional[str] = Field(None, description="Response error, if the whole batch is invalid.")
+
+
+class UserSocketMessageDto(BaseModel):
+    id: Union[int, str] = Field(description="Chosen by the client, echoed in every event about this message.")
+    message: str
+
+
+class BotSocketEventDto(BaseModel):
+    id: Optional[Union[int, str]] = Field(None, description="Id of the message the event is about.")
+    type: str = Field(description="'emotion', then 'gif' once the GIF is found, or 'error'.")
+    emotion: Optional[str] = None
+    data: Optional[str] = None
+    error: Optional[str] = None
@@ -0,0 +1,106 @@
+# Minimal in-memory stand-in for the redis commands used by the shared prediction cache:
+#   python -m api.redis_stub --port 6390
+#   PREDICTION_CACHE_REDIS_URL=redis://127.0.0.1:6390/0 uvicorn api.main:app --workers 4
+import argparse
+import asyncio
+import time
+
+store = {}
+
+
+def encode(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, Exception):
+        return b'-ERR %s\r\n' % str(value).encode('utf-8')
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode('utf-8')
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def lookup(key):
+    entry = store.get(key)
+    if entry is None:
+        return None
+
+    value, expires_at = entry
+    if expires_at is not None and expires_at <= time.monotonic():
+        del store[key]
+        return None
+    return value
+
+
+def execute(args):
+    command = args[0].upper()
+
+    if command == b'PING':
+        return 'PONG'
+    if command == b'GET':
+        return lookup(args[1])
+    if command == b'SET':
+        expires_at = None
+        options = [arg.upper() for arg in args[3:]]
+        if b'EX' in options:
+            expires_at = time.monotonic() + int(args[3 + options.index(b'EX') + 1])
+        if b'PX' in options:
+            expires_at = time.monotonic() + int(args[3 + options.index(b'PX') + 1]) / 1000
+        store[args[1]] = (args[2], expires_at)
+        return 'OK'
+    if command == b'DEL':
+        return sum(store.pop(key, None) is not None for key in args[1:])
+    if command == b'DBSIZE':
+        return len(store)
+    if command == b'FLUSHDB':
+        store.clear()
+        return 'OK'
+
+    return Exception(f"unknown command '{args[0].decode('utf-8', 'replace')}'")
+
+
+async def read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+
+    if not line.startswith(b'*'):
+        return line.split()
+
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        data = await reader.readexactly(int(header[1:]) + 2)
+        args.append(data[:-2])
+    return args
+
+
+async def handle_client(reader, writer):
+    try:
+        while True:
+            args = await read_command(reader)
+            if args is None:
+                break
+            if len(args) == 0:
+                continue
+            writer.write(encode(execute(args)))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    server = await asyncio.start_server(handle_client, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port))
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class ModelVersion:
+    def __init__(self, path, model, enc, version_path):
+        self.path = path
+        self.model = model
+        self.enc = enc
+        self.version_path = version_path
+        self.version = ModelRegistry.read_version(version_path)
+        self.loaded_at = time.time()
+
+    def describe(self):
+        return {
+            'path': self.path,
+            'version': self.version,
+            'classes': [str(label) for label in self.enc.classes_],
+            'loaded_at': self.loaded_at
+        }
+
+
+class ModelRegistry:
+    def __init__(self, path, loader, validator, history=2):
+        self._path = path
+        self._loader = loader
+        self._validator = validator
+
+        self._current = None
+        self._previous = deque(maxlen=history)
+        self._reload_lock = threading.Lock()
+        # Rejected or rolled back files are not picked up again by the watcher until they change
+        self._ignored_version = None
+
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    @staticmethod
+    def read_version(version_path):
+        try:
+            stat = os.stat(version_path)
+        except OSError:
+            return None
+        return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+    @property
+    def current(self):
+        return self._current
+
+    def __load_version(self, path):
+        model, enc, version_path = self._loader(path)
+        version = ModelVersion(path, model, enc, version_path)
+        # Also pages in the mapped arrays, so the first real request does not pay for it
+        self._validator(version.model, version.enc)
+        return version
+
+    def load(self):
+        with self._reload_lock:
+            self._current = self.__load_version(self._path)
+        return self._current
+
+    def reload(self, path=None):
+        with self._reload_lock:
+            path = path or self._path
+
+            try:
+                version = self.__load_version(path)
+            except Exception as e:
+                return False, f'Rejected model at {path}: {e}'
+
+            # A single reference assignment, requests hold on to whichever version they started with
+            self._previous.append(self._current)
+            self._current = version
+            self._path = path
+            self._ignored_version = None
+
+        return True, f'Loaded model at {path}.'
+
+    def rollback(self):
+        with self._reload_lock:
+            if len(self._previous) == 0:
+                return False, 'No previous model to roll back to.'
+
+            rolled_back = self._current
+            self._current = self._previous.pop()
+            self._path = self._current.path
+            self._ignored_version = self.read_version(rolled_back.version_path)
+
+        return True, f'Rolled back to model at {self._path}.'
+
+    def __watch(self, interval):
+        while not self._stop_watching.wait(interval):
+            current = self._current
+            version = self.read_version(current.version_path)
+
+            # Missing means a new model is being moved into place, wait for the next poll
+            if version is None or version == current.version or version == self._ignored_version:
+                continue
+
+            ok, message = self.reload(current.path)
+            if not ok:
+                self._ignored_version = version
+            print(message)
+
+    def start_watching(self, interval):
+        if self._watcher is not None:
+            return
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self.__watch, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def describe(self):
+        return {
+            'current': self._current.describe() if self._current is not None else None,
+            'previous': [version.describe() for version in reversed(self._previous)]
+        }
@@ -0,0 +1,70 @@
+import threading
+
+
+class Overloaded(Exception):
+    def __init__(self, reason):
+        super().__init__(f'Shed a chat message, reason: {reason}.')
+        self.reason = reason
+
+
+class LoadShedder:
+    FULL = 'full'
+    DEGRADED = 'degraded'
+    SHED = 'shed'
+
+    def __init__(self, degrade_queue_depth=64, max_queue_depth=512, degrade_after=0.1, deadline=2.0, retry_after=1):
+        self._degrade_queue_depth = degrade_queue_depth
+        self._max_queue_depth = max_queue_depth
+        self._degrade_after = degrade_after
+        self._deadline = deadline
+        self.retry_after = retry_after
+
+        # Messages admitted and still waiting for their prediction, only touched from the event loop
+        self._queue_depth = 0
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'admitted': 0,
+            'degraded': 0,
+            'shed_queue': 0,
+            'shed_deadline': 0
+        }
+
+    def admit(self):
+        if self._queue_depth >= self._max_queue_depth:
+            self.__count('shed_queue')
+            raise Overloaded('queue')
+
+        self._queue_depth += 1
+        self.__count('admitted')
+
+    def release(self):
+        self._queue_depth -= 1
+
+    def __count(self, stat):
+        # Profiles are picked on the threadpool, the counters are shared between its threads
+        with self._lock:
+            self._stats[stat] += 1
+
+    def profile(self, waited):
+        # Picked right before preprocessing, so time spent queueing behind other messages is accounted for
+        if waited >= self._deadline:
+            self.__count('shed_deadline')
+            return LoadShedder.SHED
+        if waited >= self._degrade_after or self._queue_depth > self._degrade_queue_depth:
+            self.__count('degraded')
+            return LoadShedder.DEGRADED
+        return LoadShedder.FULL
+
+    @property
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            'degrade_queue_depth': self._degrade_queue_depth,
+            'max_queue_depth': self._max_queue_depth,
+            'degrade_after': self._degrade_after,
+            'deadline': self._deadline,
+            'queue_depth': self._queue_depth,
+            **stats
+        }
@@ -0,0 +1,75 @@
+# Startup profile of the API, the phases recorded by api.main plus the slowest imports:
+#   python -m api.startup --profile-startup --top 25
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+class StartupProfile:
+    def __init__(self):
+        self._started_at = time.perf_counter()
+        self._last_mark = self._started_at
+        self._phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self._phases.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    @property
+    def phases(self):
+        return [{'phase': name, 'seconds': seconds} for name, seconds in self._phases]
+
+    @property
+    def total(self):
+        return self._last_mark - self._started_at
+
+    def report(self):
+        lines = [f'{name:<24}{seconds * 1000:>10.1f} ms' for name, seconds in self._phases]
+        lines.append(f'{"total":<24}{self.total * 1000:>10.1f} ms')
+        return '\n'.join(lines)
+
+
+def read_import_times(output):
+    # Lines look like 'import time:  self [us] | cumulative | imported package'
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, package = line[len('import time:'):].split('|')
+        imports.append((package.strip(), int(cumulative) / 1e6))
+    return imports
+
+
+def profile_startup(top):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import api.main as m; print(m.startup_profile.report())'],
+        capture_output=True, text=True, env=os.environ.copy()
+    )
+
+    print(result.stdout)
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        return result.returncode
+
+    print('Slowest imports (cumulative):')
+    imports = sorted(read_import_times(result.stderr), key=lambda item: item[1], reverse=True)
+    for package, seconds in imports[:top]:
+        print(f'{package:<48}{seconds * 1000:>10.1f} ms')
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile-startup', action='store_true', help='import the API and report where time goes')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    if not args.profile_startup:
+        parser.print_help()
+        sys.exit(0)
+
+    sys.exit(profile_startup(args.top))
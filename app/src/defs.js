@@ -1 +1,3 @@
-export const API_BASE_URL = 'http://127.0.0.1:8000'
\ No newline at end of file
+export const API_BASE_URL = 'http://127.0.0.1:8000'
+// Served by the app server, which proxies it to the API the same way /_api/chat is forwarded
+export const API_WS_PATH = '/ws/chat'
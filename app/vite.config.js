@@ -1,6 +1,17 @@
 import { sveltekit } from '@sveltejs/kit/vite';
 import { defineConfig } from 'vite';
+import { API_BASE_URL, API_WS_PATH } from './src/defs.js';
+
+// The browser opens the chat socket on the app's own origin, the dev and preview servers forward it to the API
+const proxy = {
+	[API_WS_PATH]: {
+		target: API_BASE_URL,
+		ws: true
+	}
+};
 
 export default defineConfig({
-	plugins: [sveltekit()]
+	plugins: [sveltekit()],
+	server: { proxy },
+	preview: { proxy }
 });
@@ -0,0 +1,175 @@
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from defs import Constants
+from nlp import InputParser, ModelArtifact, NltkResources, TextPreprocessor
+from nlp.InputParser import peak_rss_mb
+from nlp.TextPreprocessor import token_array
+
+
+def init_nltk():
+    NltkResources.configure(data_path=f'{Constants.NLTK_PATH}/nltk_data')
+
+
+def peak_rss_growth_mb(baseline_rss_mb):
+    # Peak memory is not available everywhere, compare leaves out metrics that are None
+    current_rss_mb = peak_rss_mb()
+    return current_rss_mb - baseline_rss_mb if current_rss_mb is not None and baseline_rss_mb is not None else None
+
+
+def latency_report(seconds, prefix=''):
+    seconds = np.asarray(seconds)
+    return {
+        f'{prefix}p50_ms': float(np.percentile(seconds, 50) * 1000),
+        f'{prefix}p99_ms': float(np.percentile(seconds, 99) * 1000),
+        f'{prefix}mean_ms': float(seconds.mean() * 1000),
+        f'{prefix}messages_per_second': float(len(seconds) / seconds.sum())
+    }
+
+
+def read_dataset_texts(dataset, rows=None, seed=0):
+    df = pd.read_csv(dataset['path'], usecols=[Constants.DATASET_X_COL], delimiter=dataset['delimiter'])
+    df = df.dropna()
+    if rows is not None and rows < len(df):
+        df = df.sample(rows, random_state=seed)
+    return df.reset_index(drop=True)
+
+
+def sample_messages(count, seed):
+    texts = pd.concat([read_dataset_texts(dataset)[Constants.DATASET_X_COL] for dataset in Constants.DATASETS],
+                      ignore_index=True)
+    return texts.sample(min(count, len(texts)), random_state=seed).tolist()
+
+
+def resolve_model_path(options):
+    if options.model is not None:
+        return options.model
+    for path in [Constants.MODEL_ARTIFACT_PATH, Constants.MODEL_PATH]:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_model(path):
+    if ModelArtifact.is_artifact(path):
+        artifact = ModelArtifact.load(path)
+        return artifact.model, artifact.enc
+
+    save_obj = pickle.load(open(path, 'rb'))
+    return save_obj['model'], save_obj['enc']
+
+
+def bench_nlp_text(options):
+    init_nltk()
+    messages = sample_messages(options.messages, options.seed)
+    text_preprocessor = TextPreprocessor()
+
+    # The first pass starts from an empty spell cache, the second one shows the steady state of a running API
+    report = {'messages': len(messages)}
+    for prefix in ['cold_', 'warm_']:
+        seconds = []
+        for message in messages:
+            started_at = time.perf_counter()
+            text_preprocessor.nlp_text(message)
+            seconds.append(time.perf_counter() - started_at)
+        report.update(latency_report(seconds, prefix))
+
+    return report
+
+
+def bench_preprocess_df(options):
+    init_nltk()
+    text_preprocessor = TextPreprocessor()
+    text_preprocessor.set_tested_col_tag(Constants.DATASET_X_COL)
+
+    report = {}
+    total_rows = 0
+    total_seconds = 0.0
+
+    for dataset in Constants.DATASETS:
+        name = os.path.splitext(os.path.basename(dataset['path']))[0]
+        df = read_dataset_texts(dataset, options.rows, options.seed)
+
+        started_at = time.perf_counter()
+        text_preprocessor.preprocess_df(df)
+        seconds = time.perf_counter() - started_at
+
+        report[f'{name}_rows_per_second'] = len(df) / seconds
+        total_rows += len(df)
+        total_seconds += seconds
+
+    report['rows'] = total_rows
+    report['rows_per_second'] = total_rows / total_seconds
+    return report
+
+
+def bench_ingestion(options):
+    baseline_rss_mb = peak_rss_mb()
+    input_parser = InputParser(chunk_size=Constants.DATASET_CHUNK_SIZE, random_state=options.seed)
+
+    started_at = time.perf_counter()
+    input_parser.read_from_file(csv_paths=Constants.DATASETS, csv_columns=Constants.DATASET_COLUMNS,
+                                label_column=Constants.DATASET_Y_COL)
+    read_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    input_parser.get_split_indices(Constants.TRAINING_PERCENT, Constants.DATASET_Y_COL)
+    split_seconds = time.perf_counter() - started_at
+
+    return {
+        'entries': input_parser.memory_report['entries'],
+        'read_seconds': read_seconds,
+        'split_seconds': split_seconds,
+        'dataset_mb': input_parser.memory_report['dataset_mb'],
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_growth_mb': peak_rss_growth_mb(baseline_rss_mb)
+    }
+
+
+def bench_model_load(options):
+    path = resolve_model_path(options)
+    if path is None:
+        return {'skipped': 'No trained model found, train one or pass --model.'}
+
+    baseline_rss_mb = peak_rss_mb()
+    started_at = time.perf_counter()
+    load_model(path)
+    load_seconds = time.perf_counter() - started_at
+
+    return {
+        'load_seconds': load_seconds,
+        'peak_rss_growth_mb': peak_rss_growth_mb(baseline_rss_mb)
+    }
+
+
+def bench_predict(options):
+    path = resolve_model_path(options)
+    if path is None:
+        return {'skipped': 'No trained model found, train one or pass --model.'}
+
+    init_nltk()
+    model, _ = load_model(path)
+    text_preprocessor = TextPreprocessor()
+    # Normalized into token lists the way the API does it, so that only the model is measured below
+    texts = token_array([text_preprocessor.nlp_tokens(message)
+                         for message in sample_messages(options.messages, options.seed)])
+    model.predict(texts[:1])
+
+    seconds = []
+    for i in range(len(texts)):
+        started_at = time.perf_counter()
+        model.predict(texts[i:i + 1])
+        seconds.append(time.perf_counter() - started_at)
+    report = latency_report(seconds, 'single_')
+
+    started_at = time.perf_counter()
+    for i in range(0, len(texts), options.batch_size):
+        model.predict(texts[i:i + options.batch_size])
+    report['batch_messages_per_second'] = len(texts) / (time.perf_counter() - started_at)
+    report['batch_size'] = options.batch_size
+
+    return report
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from bench.benchmarks import resolve_model_path, sample_messages
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port, env):
+    return subprocess.Popen([sys.executable, '-m', 'uvicorn', app, '--host', '127.0.0.1', '--port', str(port),
+                             '--log-level', 'warning'], env={**os.environ, **env})
+
+
+def wait_until_ready(url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{url} exited with code {process.returncode} before it was ready.')
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} was not ready after {timeout} seconds.')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def send_messages(url, messages, concurrency):
+    seconds = []
+    status_codes = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=60,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def send(message):
+            async with semaphore:
+                started_at = time.perf_counter()
+                try:
+                    status_code = (await client.post('/chat', json={'message': message})).status_code
+                except httpx.HTTPError:
+                    status_code = 'error'
+                seconds.append(time.perf_counter() - started_at)
+                status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*[send(message) for message in messages])
+        elapsed = time.perf_counter() - started_at
+
+    return seconds, status_codes, elapsed
+
+
+def bench_chat_load(options):
+    model_path = resolve_model_path(options)
+    if model_path is None:
+        return {'skipped': 'No trained model found, train one or pass --model.'}
+
+    giphy_port = free_port()
+    api_port = free_port()
+    giphy = start_server('api.giphy_stub:app', giphy_port, {
+        'GIPHY_STUB_LATENCY_MS': str(options.giphy_latency_ms),
+        'GIPHY_STUB_JITTER_MS': str(options.giphy_latency_ms / 5),
+        'GIPHY_STUB_ERROR_RATE': '0'
+    })
+    api = None
+
+    try:
+        wait_until_ready(f'http://127.0.0.1:{giphy_port}/stats', giphy, options.startup_timeout)
+        api = start_server('api.main:app', api_port, {
+            'GIPHY_API_KEY': 'bench',
+            'GIPHY_API_URL': f'http://127.0.0.1:{giphy_port}/v1/gifs/random',
+            'MODEL_PATH': model_path,
+            'SERVED_MODEL': 'stack'
+        })
+        wait_until_ready(f'http://127.0.0.1:{api_port}/ready', api, options.startup_timeout)
+
+        url = f'http://127.0.0.1:{api_port}'
+        messages = sample_messages(options.requests, options.seed)
+        asyncio.run(send_messages(url, messages[:options.concurrency], options.concurrency))
+        seconds, status_codes, elapsed = asyncio.run(send_messages(url, messages, options.concurrency))
+        giphy_requests = httpx.get(f'http://127.0.0.1:{giphy_port}/stats').json()['requests']
+    finally:
+        if api is not None:
+            stop_server(api)
+        stop_server(giphy)
+
+    seconds = np.asarray(seconds)
+    return {
+        'requests': len(messages),
+        'concurrency': options.concurrency,
+        'requests_per_second': len(messages) / elapsed,
+        'p50_ms': float(np.percentile(seconds, 50) * 1000),
+        'p99_ms': float(np.percentile(seconds, 99) * 1000),
+        'error_rate': 1 - status_codes.get('200', 0) / len(messages),
+        'status_codes': status_codes,
+        'giphy_requests': giphy_requests
+    }
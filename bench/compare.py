@@ -0,0 +1,82 @@
+# Compares two benchmark result files and exits with 1 when the second one regressed:
+#   python -m bench.compare bench/baseline.json bench_results.json --tolerance 0.15
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ('_per_second',)
+LOWER_IS_BETTER = ('_seconds', '_ms', '_mb', '_rate')
+
+
+def direction(metric):
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(baseline, current, tolerance):
+    # Every shared metric with a known direction is checked, counts and settings are only reported
+    rows = []
+    for name, metrics in current['results'].items():
+        baseline_metrics = baseline['results'].get(name, {})
+        for metric, value in metrics.items():
+            base = baseline_metrics.get(metric)
+            sign = direction(metric)
+            if sign == 0 or not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+                continue
+
+            # A relative change means nothing from zero (an error rate going from 0 to 1), any move the wrong way
+            # from a zero baseline is a regression
+            if base != 0:
+                change = (value - base) / base
+                regression = change * sign < -tolerance
+            else:
+                change = None
+                regression = (value - base) * sign < 0
+            rows.append({
+                'benchmark': name,
+                'metric': metric,
+                'baseline': base,
+                'current': value,
+                'change': change,
+                'regression': regression
+            })
+    return rows
+
+
+def print_comparison(baseline, current, rows, tolerance):
+    if baseline['environment'] != current['environment']:
+        print('Warning: the results come from different environments, differences may not be regressions.')
+    if baseline['options'] != current['options']:
+        print('Warning: the results were measured with different options.')
+
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        change = f'{row["change"] * 100:>+9.1f}%' if row['change'] is not None else f'{"from 0":>10}'
+        print(f'{row["benchmark"]:<16}{row["metric"]:<36}{row["baseline"]:>14.4f}{row["current"]:>14.4f}'
+              f'{change}  {flag}')
+
+    regressions = [row for row in rows if row['regression']]
+    print(f'{len(regressions)} of {len(rows)} metrics regressed by more than {tolerance * 100:.0f}%.')
+    return regressions
+
+
+def read_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='relative change allowed before flagging')
+    args = parser.parse_args()
+
+    baseline_results = read_results(args.baseline)
+    current_results = read_results(args.current)
+    comparison = compare(baseline_results, current_results, args.tolerance)
+
+    sys.exit(1 if print_comparison(baseline_results, current_results, comparison, args.tolerance) else 0)
@@ -0,0 +1,140 @@
+# Benchmarks preprocessing, ingestion, model loading, prediction, the /chat endpoint and the memory of parallel
+# hyperparameter search, run from the project root:
+#   python -m bench.run --output bench_results.json
+#   python -m bench.run --only nlp_text predict --baseline bench/baseline.json
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+import traceback
+from importlib import metadata
+
+from bench import benchmarks, chat_load, search_memory
+from bench.compare import compare, print_comparison, read_results
+
+BENCHMARKS = {
+    'nlp_text': benchmarks.bench_nlp_text,
+    'preprocess_df': benchmarks.bench_preprocess_df,
+    'ingestion': benchmarks.bench_ingestion,
+    'model_load': benchmarks.bench_model_load,
+    'predict': benchmarks.bench_predict,
+    'chat_load': chat_load.bench_chat_load,
+    'search_memory': search_memory.bench_search_memory
+}
+
+PACKAGES = ['numpy', 'pandas', 'scikit-learn', 'nltk', 'pyspellchecker', 'fastapi', 'uvicorn']
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def package_version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': {package: package_version(package) for package in PACKAGES}
+    }
+
+
+def run_isolated(name, options, results):
+    try:
+        results.put(('ok', BENCHMARKS[name](options)))
+    except Exception:
+        results.put(('error', traceback.format_exc()))
+
+
+def run_benchmark(name, options):
+    # Every benchmark gets a fresh interpreter, so caches and peak memory of one do not leak into the next
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_isolated, args=(name, options, results))
+
+    started_at = time.perf_counter()
+    process.start()
+    while True:
+        try:
+            outcome, value = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                outcome, value = 'error', f'Benchmark process exited with code {process.exitcode}.'
+                break
+    process.join()
+    print(f'Benchmark {name} finished in {time.perf_counter() - started_at:.1f} s.')
+
+    if outcome == 'error':
+        print(value)
+        return {'error': value.strip().splitlines()[-1]}
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help='results file to compare against, regressions exit with 1')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='relative change allowed before flagging')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--messages', type=int, default=300, help='messages timed by nlp_text and predict')
+    parser.add_argument('--rows', type=int, default=500, help='rows per dataset file for preprocess_df')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--model', help='model artifact or pickle, defaults to the trained stack model')
+    parser.add_argument('--requests', type=int, default=500, help='/chat requests sent by chat_load')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--giphy-latency-ms', type=float, default=100)
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    parser.add_argument('--search-jobs', type=int, nargs='+', default=[1, 2, 4],
+                        help='n_jobs values compared by search_memory')
+    parser.add_argument('--search-rows', type=int, default=20000, help='training rows searched by search_memory')
+    parser.add_argument('--search-candidates', type=int, default=4)
+    parser.add_argument('--search-repeat', type=int, default=1,
+                        help='times search_memory repeats its rows, to measure data dominated memory')
+    options = parser.parse_args()
+
+    settings = {key: value for key, value in vars(options).items()
+                if key not in ['only', 'output', 'baseline', 'tolerance']}
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'environment': environment(),
+        'options': settings,
+        'results': {name: run_benchmark(name, options) for name in options.only}
+    }
+
+    with open(options.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote benchmark results to {options.output}.')
+
+    for name, metrics in report['results'].items():
+        print(f'{name}: ' + ', '.join(
+            f'{metric}={value:.4g}' if isinstance(value, float) else f'{metric}={value}'
+            for metric, value in metrics.items()
+        ))
+
+    if options.baseline is not None:
+        baseline = read_results(options.baseline)
+        if print_comparison(baseline, report, compare(baseline, report, options.tolerance), options.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import numpy as np
+from joblib.externals.loky import get_reusable_executor
+from scipy.stats import uniform
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+
+from api.memory import read_smaps_rollup
+from defs import Constants
+from nlp import HashingTfidfVectorizer, SharedMatrix
+from nlp.TextPreprocessor import identity_tokenizer
+
+
+def process_tree(pid):
+    pids = [pid]
+    for tid in os.listdir(f'/proc/{pid}/task'):
+        try:
+            with open(f'/proc/{pid}/task/{tid}/children', 'r') as f:
+                children = [int(child) for child in f.read().split()]
+        except OSError:
+            continue
+        for child in children:
+            pids.extend(process_tree(child))
+    return pids
+
+
+def tree_pss(pid):
+    # Pss splits the pages of the shared matrix between the workers mapping it, so the sum is the real footprint
+    total = 0
+    for process in process_tree(pid):
+        try:
+            total += read_smaps_rollup(process)['pss']
+        except (OSError, KeyError):
+            pass
+    return total
+
+
+class PeakMemorySampler:
+    def __init__(self, interval=0.05):
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.peak = 0
+
+    def __run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_pss(os.getpid()))
+            self._stop.wait(self._interval)
+
+    def __enter__(self):
+        self.peak = tree_pss(os.getpid())
+        self._thread = threading.Thread(target=self.__run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, tree_pss(os.getpid()))
+
+
+def run_search(estimator, x, y, n_jobs, options):
+    # Only the data path differs between the modes, a cheap classifier keeps the runs short and its own memory small
+    search = RandomizedSearchCV(estimator, {'model__alpha': uniform(loc=1e-6, scale=1e-4)},
+                                n_iter=options.search_candidates, cv=5, refit=False, n_jobs=n_jobs,
+                                random_state=options.seed)
+
+    baseline_mb = tree_pss(os.getpid()) / 1024 ** 2
+    started_at = time.perf_counter()
+    with PeakMemorySampler() as sampler:
+        search.fit(x, y)
+    seconds = time.perf_counter() - started_at
+
+    # Workers are stopped between runs, so that each run starts them (and their memory) from scratch
+    get_reusable_executor().shutdown(wait=True)
+
+    return seconds, sampler.peak / 1024 ** 2 - baseline_mb
+
+
+def bench_search_memory(options):
+    if not os.path.isfile(Constants.PARSED_DATASET_PATH):
+        return {'skipped': 'No preprocessed dataset found, train a model first.'}
+
+    with open(Constants.PARSED_DATASET_PATH, 'rb') as f:
+        training_set = pickle.load(f)['training']
+    # Repeating the split reaches sizes where the data, not each worker's interpreter, dominates memory
+    x = np.concatenate([training_set['x'][:options.search_rows]] * options.search_repeat)
+    y = np.concatenate([training_set['y'][:options.search_rows]] * options.search_repeat)
+
+    report = {'rows': len(y)}
+
+    with tempfile.TemporaryDirectory() as path:
+        started_at = time.perf_counter()
+        # Shared matrices are only used for hashed features, which have no vocabulary fitted across folds
+        counts = HashingVectorizer(tokenizer=identity_tokenizer, stop_words='english', lowercase=False,
+                                   n_features=Constants.HASHING_FEATURES,
+                                   alternate_sign=Constants.HASHING_ALTERNATE_SIGN, norm=None).transform(x)
+        SharedMatrix.dump(counts, y, path)
+        report['shared_matrix_seconds'] = time.perf_counter() - started_at
+        report['shared_matrix_mb'] = (counts.data.nbytes + counts.indices.nbytes + counts.indptr.nbytes) / 1024 ** 2
+        del counts
+
+        shared_x, shared_y = SharedMatrix.load(path)
+
+        for n_jobs in options.search_jobs:
+            # Token lists are pickled to every worker which hashes them again per fold, the shared matrix is
+            # mapped from the same file by all of them. Both modes copy each fold's rows into its worker, so peak
+            # memory grows with n_jobs either way.
+            for mode, estimator, search_x, search_y in [
+                ('tokens', Pipeline([
+                    ('vectorizer', HashingTfidfVectorizer(tokenizer=identity_tokenizer, stop_words='english',
+                                                          lowercase=False, n_features=Constants.HASHING_FEATURES,
+                                                          alternate_sign=Constants.HASHING_ALTERNATE_SIGN)),
+                    ('model', SGDClassifier(max_iter=5, tol=None))
+                ]), x, y),
+                ('shared', Pipeline([
+                    ('tfidf', TfidfTransformer()),
+                    ('model', SGDClassifier(max_iter=5, tol=None))
+                ]), shared_x, shared_y)
+            ]:
+                seconds, peak_mb = run_search(estimator, search_x, search_y, n_jobs, options)
+                report[f'n{n_jobs}_{mode}_seconds'] = seconds
+                report[f'n{n_jobs}_{mode}_peak_pss_growth_mb'] = peak_mb
+                print(f'n_jobs={n_jobs} {mode}: {seconds:.1f} s, peak memory +{peak_mb:.1f} MB.')
+
+    return report
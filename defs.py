@@ -22,6 +22,56 @@ class Constants:
     EMOTIONS = ['happy', 'sad', 'anger', 'fear', 'disgust', 'surprise']
 
     TRAINING_PERCENT = 0.8
+    DATASET_CHUNK_SIZE = 20000
+    DATASET_SPLIT_SEED = None
 
     PARSED_DATASET_PATH = os.path.join(os.getcwd(), 'parsed_data', 'data.txt')
+    PREPROCESSING_WORKERS = None
+    PREPROCESSING_CHUNK_SIZE = 256
+    CORPUS_CACHE_PATH = os.path.join(os.getcwd(), 'parsed_data', 'corpus_cache')
+    TFIDF_CACHE_PATH = os.path.join(os.getcwd(), 'parsed_data', 'tfidf_cache')
+    TFIDF_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+    # 'hashing' replaces the TF-IDF vocabulary with a fixed number of hashed features and their IDF weights
+    VECTORIZER = 'tfidf'
+    HASHING_FEATURES = 2 ** 18
+    HASHING_ALTERNATE_SIGN = False
+
+    MODEL_SEARCH = 'random'
+    SEARCH_SEED = 0
+    SEARCH_LOG_PATH = os.path.join(os.getcwd(), 'parsed_data', 'search_log.jsonl')
+    SEARCH_TIME_BUDGET = None
+    SEARCH_N_JOBS = -1
+    # Random search over hashed features fits its candidates on one memory mapped count matrix shared by all workers.
+    # It saves the token lists and hashing per worker, but each worker still copies its fold's rows to fit them, and
+    # the default TF-IDF vocabulary features never use it.
+    SEARCH_SHARED_MATRIX = True
+    SHARED_MATRIX_PATH = os.path.join(os.getcwd(), 'parsed_data', 'shared_matrix')
+    HALVING_CANDIDATES = 27
+    HALVING_FACTOR = 3
+    HALVING_MIN_SAMPLES = 2000
+    HALVING_CV = 5
     MODEL_PATH = os.path.join(os.getcwd(), 'model', 'stack_model.pkl')
+    MODEL_ARTIFACT_PATH = os.path.join(os.getcwd(), 'model', 'stack_model')
+    FAST_MODEL_ARTIFACT_PATH = os.path.join(os.getcwd(), 'model', 'fast_model')
+    FAST_MODEL_METHOD = 'distill'
+    FAST_MODEL_C = 1.0
+    FAST_MODEL_COMPONENTS = 1000
+
+    ONLINE_MODEL_ARTIFACT_PATH = os.path.join(os.getcwd(), 'model', 'online_model')
+    FEEDBACK_PATH = os.path.join(os.getcwd(), 'dataset', 'feedback.jsonl')
+    ONLINE_BATCH_SIZE = 1000
+    ONLINE_EVAL_EVERY = 10
+    ONLINE_ALPHA = 1e-5
+    ONLINE_BOOTSTRAP_EPOCHS = 5
+
+    CLASSIFY_CHUNK_SIZE = 10000
+    CLASSIFY_WORKERS = None
+    CLASSIFY_CHECKPOINT_SUFFIX = '.checkpoint'
+
+    SPELL_CACHE_PATH = os.path.join(os.getcwd(), 'parsed_data', 'spell_cache.json')
+    SPELL_CACHE_SIZE = 200000
+    SPELL_DISTANCE = 2
+    SPELL_MAX_WORD_LENGTH = None
+
+    STEM_CACHE_SIZE = 100000
@@ -1,14 +1,97 @@
+import argparse
+import os
+
 from defs import Constants
-from nlp import NLPController
+from nlp import BulkClassifier, ModelArtifact, NLPController, NltkResources
 
 
-def main():
+def train(args):
     nlp_controller = NLPController(nltk_path=Constants.NLTK_PATH)
     nlp_controller.train_model(
-        path=Constants.MODEL_PATH
+        path=Constants.MODEL_PATH,
+        artifact_path=Constants.MODEL_ARTIFACT_PATH,
+        search=args.search,
+        fast_artifact_path=Constants.FAST_MODEL_ARTIFACT_PATH if args.fast_model else None,
+        fast_method=args.fast_model,
+        vectorizer=args.vectorizer,
+        search_time_budget=args.search_time_budget,
+        search_n_jobs=args.search_jobs
     )
     print(f'Currently trained model has a score of: {nlp_controller.model_score}')
 
+    if args.compare_vectorizers:
+        nlp_controller.compare_vectorizers()
+
+
+def update(args):
+    nlp_controller = NLPController(nltk_path=Constants.NLTK_PATH)
+    nlp_controller.update_model(feedback_path=args.feedback, artifact_path=args.output, batch_size=args.batch_size,
+                                eval_every=args.eval_every)
+
+
+def classify(args):
+    NltkResources.configure(data_path=f'{Constants.NLTK_PATH}/nltk_data')
+
+    model_path = args.model or Constants.MODEL_ARTIFACT_PATH
+    if args.model is None and not ModelArtifact.is_artifact(model_path):
+        model_path = Constants.MODEL_PATH
+    checkpoint_path = args.checkpoint or f'{args.output}{Constants.CLASSIFY_CHECKPOINT_SUFFIX}'
+
+    if args.restart and os.path.isfile(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    bulk_classifier = BulkClassifier(model_path, chunk_size=args.chunk_size, workers=args.workers,
+                                     spell_cache_path=Constants.SPELL_CACHE_PATH)
+    bulk_classifier.classify(args.input, args.output, text_field=args.text_field, id_field=args.id_field,
+                             checkpoint_path=checkpoint_path, delimiter=args.delimiter)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--search', choices=['random', 'halving'], default=Constants.MODEL_SEARCH)
+    parser.add_argument('--search-time-budget', type=float, default=Constants.SEARCH_TIME_BUDGET)
+    parser.add_argument('--search-jobs', type=int, default=Constants.SEARCH_N_JOBS,
+                        help='parallel search workers, -1 for one per core')
+    parser.add_argument('--fast-model', choices=['distill', 'nystroem'],
+                        help='also export a single linear model for low latency serving')
+    parser.add_argument('--vectorizer', choices=['tfidf', 'hashing'], default=Constants.VECTORIZER)
+    parser.add_argument('--compare-vectorizers', action='store_true',
+                        help='refit the trained model on the other vectorizer and compare them on the held-out set')
+    commands = parser.add_subparsers(dest='command')
+
+    # Without a command the model is trained (or loaded) and scored, as before
+    commands.add_parser('train')
+
+    update_parser = commands.add_parser('update', help='fold new labeled rows into the online model')
+    update_parser.add_argument('--feedback', default=Constants.FEEDBACK_PATH,
+                               help='append-only JSON lines file with content and emotion fields')
+    update_parser.add_argument('--output', default=Constants.ONLINE_MODEL_ARTIFACT_PATH,
+                               help='online model artifact, created from the training split on first use')
+    update_parser.add_argument('--batch-size', type=int, default=Constants.ONLINE_BATCH_SIZE)
+    update_parser.add_argument('--eval-every', type=int, default=Constants.ONLINE_EVAL_EVERY,
+                               help='batches between held-out evaluations')
+
+    classify_parser = commands.add_parser('classify', help='label every message of a CSV or JSONL file')
+    classify_parser.add_argument('--input', required=True, help='.csv file or JSON lines file with the messages')
+    classify_parser.add_argument('--output', required=True, help='.csv or JSON lines file written with the labels')
+    classify_parser.add_argument('--text-field', default=Constants.DATASET_X_COL)
+    classify_parser.add_argument('--id-field', help='field copied to the output, the row number otherwise')
+    classify_parser.add_argument('--delimiter', default=',', help='CSV input delimiter')
+    classify_parser.add_argument('--model', help='model artifact or pickle, defaults to the trained model')
+    classify_parser.add_argument('--chunk-size', type=int, default=Constants.CLASSIFY_CHUNK_SIZE)
+    classify_parser.add_argument('--workers', type=int, default=Constants.CLASSIFY_WORKERS)
+    classify_parser.add_argument('--checkpoint', help=f'defaults to the output path with '
+                                                      f'{Constants.CLASSIFY_CHECKPOINT_SUFFIX} appended')
+    classify_parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    args = parser.parse_args()
+
+    if args.command == 'classify':
+        classify(args)
+    elif args.command == 'update':
+        update(args)
+    else:
+        train(args)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+import os
+import pickle
+import time
+
+import pandas as pd
+
+from defs import Constants
+from nlp.ModelArtifact import ModelArtifact
+from nlp.PreprocessingPool import PreprocessingPool
+from nlp.SpellEngine import SpellEngine
+from nlp.TextPreprocessor import TextPreprocessor, token_array
+
+
+class BulkClassifier:
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, model_path, chunk_size=Constants.CLASSIFY_CHUNK_SIZE, workers=Constants.CLASSIFY_WORKERS,
+                 spell_cache_path=None):
+        self._model, self._enc = self.__load_model(model_path)
+        self._chunk_size = chunk_size
+        self._workers = workers or os.cpu_count() or 1
+        self._spell_cache_path = spell_cache_path
+
+        if spell_cache_path is not None:
+            SpellEngine.configure(cache_path=spell_cache_path)
+        self._text_preprocessor = TextPreprocessor()
+        self._preprocessing_pool = PreprocessingPool(workers=self._workers, spell_cache_path=spell_cache_path) \
+            if self._workers > 1 else None
+
+    @staticmethod
+    def __load_model(path):
+        if ModelArtifact.is_artifact(path):
+            artifact = ModelArtifact.load(path)
+            return artifact.model, artifact.enc
+
+        save_obj = pickle.load(open(path, 'rb'))
+        return save_obj['model'], save_obj['enc']
+
+    @staticmethod
+    def __file_format(path):
+        return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+
+    def __read_jsonl(self, path, text_field, position):
+        # Positions are byte offsets, a resumed run seeks straight past the rows already written
+        with open(path, 'rb') as f:
+            f.seek(position)
+            records = []
+            while True:
+                line = f.readline()
+                if line.strip():
+                    record = json.loads(line)
+                    records.append((record.get(text_field), record))
+                if len(records) == self._chunk_size or (not line and records):
+                    yield records, f.tell()
+                    records = []
+                if not line:
+                    break
+
+    def __read_csv(self, path, text_field, position, delimiter):
+        # Positions are row counts here, quoted fields can span lines so rows cannot be found by byte offset
+        reader = pd.read_csv(path, delimiter=delimiter, dtype=str, keep_default_na=False,
+                             skiprows=range(1, position + 1), chunksize=self._chunk_size)
+        for chunk in reader:
+            position += len(chunk)
+            yield [(record.get(text_field), record) for record in chunk.to_dict('records')], position
+
+    def __normalize(self, texts):
+        unique_texts = list(dict.fromkeys(str(text) for text in texts if text))
+
+        if self._preprocessing_pool is not None:
+            tokens = self._preprocessing_pool.process(unique_texts)
+        else:
+            tokens = [self._text_preprocessor.nlp_tokens(text) for text in unique_texts]
+
+        return dict(zip(unique_texts, tokens))
+
+    def __predict(self, texts):
+        normalized = self.__normalize(texts)
+
+        # Texts normalizing to the same tokens are predicted once, the joined tokens only serve as the key
+        unique_tokens = {' '.join(tokens): tokens for tokens in normalized.values()}
+
+        labels = {}
+        if len(unique_tokens) > 0:
+            predictions = self._enc.inverse_transform(self._model.predict(token_array(list(unique_tokens.values()))))
+            labels = dict(zip(unique_tokens.keys(), [str(label) for label in predictions]))
+
+        return [labels[' '.join(normalized[str(text)])] if text else None for text in texts]
+
+    @staticmethod
+    def __read_checkpoint(checkpoint_path, settings, output_path):
+        if checkpoint_path is None or not os.path.isfile(checkpoint_path):
+            return None
+
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+
+        if checkpoint.get('settings') != settings:
+            print(f'Checkpoint {checkpoint_path} belongs to a different run, starting over.')
+            return None
+        if not os.path.isfile(output_path) or os.path.getsize(output_path) < checkpoint['output_bytes']:
+            print(f'Output {output_path} is shorter than its checkpoint, starting over.')
+            return None
+
+        return checkpoint
+
+    @staticmethod
+    def __write_checkpoint(checkpoint_path, checkpoint):
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def classify(self, input_path, output_path, text_field=Constants.DATASET_X_COL, id_field=None,
+                 checkpoint_path=None, delimiter=','):
+        input_format = self.__file_format(input_path)
+        output_format = self.__file_format(output_path)
+        label_field = Constants.DATASET_Y_COL
+
+        settings = {
+            'version': BulkClassifier.CHECKPOINT_VERSION,
+            'input': os.path.abspath(input_path),
+            'output': os.path.abspath(output_path),
+            'text_field': text_field,
+            'id_field': id_field
+        }
+        checkpoint = self.__read_checkpoint(checkpoint_path, settings, output_path)
+        position = checkpoint['position'] if checkpoint else 0
+        rows = checkpoint['rows'] if checkpoint else 0
+
+        if checkpoint:
+            print(f'Resuming from row {rows}.')
+
+        with open(output_path, 'r+b' if checkpoint else 'wb') as out:
+            # Rows written after the last checkpoint are dropped, they are classified again
+            out.truncate(checkpoint['output_bytes'] if checkpoint else 0)
+            out.seek(0, os.SEEK_END)
+            columns = [id_field or 'row', label_field]
+
+            if output_format == 'csv' and not checkpoint:
+                out.write((','.join(columns) + '\n').encode('utf-8'))
+
+            chunks = self.__read_csv(input_path, text_field, position, delimiter) if input_format == 'csv' \
+                else self.__read_jsonl(input_path, text_field, position)
+            input_bytes = os.path.getsize(input_path)
+            started_at = time.perf_counter()
+            started_rows = rows
+
+            # The workers load NLTK and the spell checker once and then serve every chunk of the run
+            if self._preprocessing_pool is not None:
+                self._preprocessing_pool.start()
+
+            try:
+                for records, position in chunks:
+                    chunk_started_at = time.perf_counter()
+                    labels = self.__predict([text for text, _ in records])
+
+                    lines = io.StringIO()
+                    writer = csv.writer(lines, lineterminator='\n')
+                    for (_, record), label in zip(records, labels):
+                        values = [record.get(id_field) if id_field else rows, label]
+                        rows += 1
+                        if output_format == 'csv':
+                            writer.writerow(values)
+                        else:
+                            lines.write(json.dumps(dict(zip(columns, values))) + '\n')
+
+                    out.write(lines.getvalue().encode('utf-8'))
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                    # A resumed run starts from the corrections found so far
+                    SpellEngine.get_instance().save()
+
+                    if checkpoint_path is not None:
+                        self.__write_checkpoint(checkpoint_path, {
+                            'settings': settings,
+                            'position': position,
+                            'rows': rows,
+                            'output_bytes': out.tell()
+                        })
+
+                    chunk_rate = len(records) / (time.perf_counter() - chunk_started_at)
+                    overall_rate = (rows - started_rows) / (time.perf_counter() - started_at)
+                    progress = f' ({position / input_bytes * 100:.1f}% of the input)' if input_format == 'jsonl' else ''
+                    print(f'Classified {rows} rows{progress}, {chunk_rate:.0f} rows/s for this chunk, '
+                          f'{overall_rate:.0f} rows/s overall.')
+            finally:
+                if self._preprocessing_pool is not None:
+                    self._preprocessing_pool.close()
+
+        print(f'Finished classifying {rows} rows into {output_path}.')
+        return rows
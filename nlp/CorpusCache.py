@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+class CorpusCache:
+    FORMAT_VERSION = 1
+    MANIFEST_FILE = 'manifest.json'
+    KEY_DTYPE = 'S16'
+
+    def __init__(self, path, config, input_paths=None):
+        self._config_key = hashlib.sha256(json.dumps({
+            'format_version': CorpusCache.FORMAT_VERSION,
+            'config': config
+        }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+        # Every preprocessing configuration gets its own directory, switching back and forth keeps both
+        self._path = os.path.join(path, self._config_key)
+        self._input_checksum = CorpusCache.input_checksum(input_paths or [])
+
+        self._keys = np.empty(0, dtype=CorpusCache.KEY_DTYPE)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._token_ids = np.empty(0, dtype=np.int32)
+        self._vocabulary = []
+        self._stored_input_checksum = None
+
+        self._new_entries = {}
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def input_checksum(input_paths):
+        digest = hashlib.sha256()
+        for input_path in input_paths:
+            with open(input_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def row_key(text):
+        return hashlib.blake2b(str(text).encode('utf-8'), digest_size=16).digest()
+
+    def load(self):
+        manifest_path = os.path.join(self._path, CorpusCache.MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            print(f'Corpus cache {self._config_key} is empty.')
+            return
+
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        arrays = lambda name: np.load(os.path.join(self._path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+
+        self._keys = arrays('keys')
+        self._offsets = arrays('offsets')
+        self._token_ids = arrays('token_ids')
+        self._vocabulary = arrays('vocabulary').tolist()
+        self._stored_input_checksum = manifest['input_checksum']
+
+        state = 'unchanged' if self._stored_input_checksum == self._input_checksum else 'changed'
+        print(f'Loaded corpus cache {self._config_key} with {len(self._keys)} rows, input files {state}.')
+
+    def __stored_tokens(self, position):
+        token_ids = self._token_ids[self._offsets[position]:self._offsets[position + 1]]
+        return [self._vocabulary[token_id] for token_id in token_ids]
+
+    def lookup(self, texts):
+        keys = np.array([CorpusCache.row_key(text) for text in texts], dtype=CorpusCache.KEY_DTYPE)
+        positions = np.searchsorted(self._keys, keys)
+        found = positions < len(self._keys)
+        found[found] = self._keys[positions[found]] == keys[found]
+
+        results = []
+        for key, position, is_found in zip(keys.tolist(), positions.tolist(), found.tolist()):
+            if is_found:
+                results.append(self.__stored_tokens(position))
+            else:
+                results.append(self._new_entries.get(key))
+
+        hits = sum(result is not None for result in results)
+        self._hits += hits
+        self._misses += len(results) - hits
+
+        return results
+
+    def update(self, texts, token_lists):
+        for text, tokens in zip(texts, token_lists):
+            self._new_entries[CorpusCache.row_key(text)] = list(tokens)
+
+    def save(self):
+        if len(self._new_entries) == 0 and self._stored_input_checksum == self._input_checksum:
+            return
+
+        vocabulary = {token: i for i, token in enumerate(self._vocabulary)}
+        new_keys = sorted(self._new_entries)
+        new_offsets = [0]
+        new_token_ids = []
+
+        for key in new_keys:
+            for token in self._new_entries[key]:
+                new_token_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+            new_offsets.append(len(new_token_ids))
+
+        # Old and new rows are merged by key, so lookups can keep using a binary search
+        keys = np.concatenate([self._keys, np.array(new_keys, dtype=CorpusCache.KEY_DTYPE)])
+        lengths = np.concatenate([np.diff(self._offsets), np.diff(new_offsets)])
+        row_token_ids = np.concatenate([np.asarray(self._token_ids), np.array(new_token_ids, dtype=np.int32)])
+        row_starts = np.concatenate([self._offsets[:-1], len(self._token_ids) + np.array(new_offsets[:-1])])
+
+        order = np.argsort(keys, kind='stable')
+        lengths = lengths[order]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        token_ids = np.concatenate([row_token_ids[start:start + length]
+                                    for start, length in zip(row_starts[order], lengths)] + [[]]).astype(np.int32)
+
+        tmp_path = f'{self._path}.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        for name, array in [('keys', keys[order]), ('offsets', offsets), ('token_ids', token_ids),
+                            ('vocabulary', np.array(sorted(vocabulary, key=vocabulary.get) or [''], dtype=str))]:
+            np.save(os.path.join(tmp_path, f'{name}.npy'), array, allow_pickle=False)
+
+        with open(os.path.join(tmp_path, CorpusCache.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump({
+                'format_version': CorpusCache.FORMAT_VERSION,
+                'config_key': self._config_key,
+                'input_checksum': self._input_checksum,
+                'rows': len(keys)
+            }, f)
+
+        if os.path.exists(self._path):
+            shutil.rmtree(self._path)
+        os.replace(tmp_path, self._path)
+
+        print(f'Saved corpus cache {self._config_key} with {len(keys)} rows ({len(new_keys)} new).')
+
+        self._new_entries = {}
+        self.load()
+
+    @property
+    def stats(self):
+        lookups = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups else 0.0,
+            'rows': len(self._keys) + len(self._new_entries)
+        }
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+
+def _fit_and_score(estimator, params, X_train, y_train, X_test, y_test):
+    started_at = time.monotonic()
+    estimator = clone(estimator).set_params(**params)
+
+    # Some sampled combinations are invalid (e.g. lbfgs with l1), they drop out like hopeless ones
+    try:
+        estimator.fit(X_train, y_train)
+        return float(estimator.score(X_test, y_test)), None, time.monotonic() - started_at
+    except Exception as e:
+        return None, str(e), time.monotonic() - started_at
+
+
+class HalvingSearch:
+    def __init__(self, estimator, param_distributions, n_candidates=27, factor=3, min_samples=2000, cv=5,
+                 time_budget=None, log_path=None, random_state=0, n_jobs=None):
+        self._estimator = estimator
+        self._param_distributions = param_distributions
+        self._n_candidates = n_candidates
+        self._factor = factor
+        self._min_samples = min_samples
+        self._cv = cv
+        self._time_budget = time_budget
+        self._log_path = log_path
+        self._random_state = random_state
+        self._n_jobs = n_jobs
+
+        self._scores = {}
+        self._cancelled = set()
+        self._deadline = None
+
+        self.best_params_ = None
+        self.best_score_ = None
+        self.best_estimator_ = None
+        self.results_ = []
+        self.n_fits_ = 0
+
+    @staticmethod
+    def __data_checksum(X, y):
+        # Training rows change with every unseeded split, fold scores logged on other rows cannot be mixed in
+        # Object arrays would hash their pointers, labels of any dtype are hashed by value
+        labels = np.ascontiguousarray(y).tobytes() if y.dtype != object else '\x1f'.join(map(str, y)).encode('utf-8')
+        checksum = hashlib.sha256(labels)
+        for row in X:
+            row = row if isinstance(row, str) else '\x1f'.join(str(token) for token in row)
+            checksum.update(row.encode('utf-8') + b'\x1e')
+        return checksum.hexdigest()
+
+    def __config(self, candidates, X, y):
+        return {
+            'candidates': candidates,
+            'factor': self._factor,
+            'min_samples': self._min_samples,
+            'cv': self._cv,
+            'random_state': self._random_state,
+            'n_samples': len(y),
+            'data_checksum': self.__data_checksum(X, y)
+        }
+
+    def __log(self, event):
+        if self._log_path:
+            with open(self._log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event) + '\n')
+
+    def __resume(self, config):
+        if not self._log_path:
+            return
+
+        if os.path.isfile(self._log_path):
+            with open(self._log_path, 'r', encoding='utf-8') as f:
+                events = [json.loads(line) for line in f if line.strip()]
+
+            # A log from a different search cannot be replayed, it is started over
+            if len(events) > 0 and events[0].get('config') == config:
+                for event in events[1:]:
+                    key = (event['rung'], event['candidate'])
+                    if event['event'] == 'fold':
+                        self._scores.setdefault(key, {})[event['fold']] = event['score']
+                    elif event['event'] in ['cancelled', 'failed']:
+                        self._cancelled.add(key)
+
+                print(f'Resuming search from {self._log_path} with {len(events) - 1} logged events.')
+                return
+
+            if len(events) > 0:
+                print(f'Search log {self._log_path} was written for other candidates or training rows, starting over. '
+                      f'Searches only resume across runs with a fixed DATASET_SPLIT_SEED.')
+
+        if os.path.dirname(self._log_path) and not os.path.exists(os.path.dirname(self._log_path)):
+            os.makedirs(os.path.dirname(self._log_path))
+
+        with open(self._log_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'event': 'start', 'config': config}) + '\n')
+
+    def __out_of_time(self):
+        return self._deadline is not None and time.monotonic() > self._deadline
+
+    def __evaluate(self, parallel, rung, candidate, params, X, y, folds, cutoff):
+        key = (rung, candidate)
+        scores = self._scores.setdefault(key, {})
+        remaining = [fold for fold in range(len(folds)) if fold not in scores]
+
+        # Folds run in batches of one per worker, the cutoff and the time budget are checked between batches
+        batch_size = max(effective_n_jobs(self._n_jobs), 1)
+
+        for batch_start in range(0, len(remaining), batch_size):
+            if self.__out_of_time():
+                return None
+
+            # Even perfect scores on the remaining folds would not get this candidate promoted
+            if cutoff is not None and (sum(scores.values()) + self._cv - len(scores)) / self._cv < cutoff:
+                self._cancelled.add(key)
+                self.__log({'event': 'cancelled', 'rung': rung, 'candidate': candidate})
+                return None
+
+            batch = remaining[batch_start:batch_start + batch_size]
+            self.n_fits_ += len(batch)
+            results = parallel(
+                delayed(_fit_and_score)(self._estimator, params, X[folds[fold][0]], y[folds[fold][0]],
+                                        X[folds[fold][1]], y[folds[fold][1]])
+                for fold in batch
+            )
+
+            for fold, (score, error, seconds) in zip(batch, results):
+                if error is not None:
+                    self._cancelled.add(key)
+                    self.__log({'event': 'failed', 'rung': rung, 'candidate': candidate, 'error': error})
+                    return None
+
+                scores[fold] = score
+                self.__log({'event': 'fold', 'rung': rung, 'candidate': candidate, 'fold': fold, 'score': score,
+                            'seconds': seconds})
+
+        return sum(scores.values()) / self._cv
+
+    def fit(self, X, y):
+        if not isinstance(X, np.ndarray):
+            # Token lists of equal length would otherwise turn into a 2d array
+            X_array = np.empty(len(X), dtype=object)
+            X_array[:] = list(X)
+            X = X_array
+        y = np.asarray(y)
+
+        candidates = [
+            {name: value.item() if isinstance(value, np.generic) else value for name, value in params.items()}
+            for params in ParameterSampler(self._param_distributions, self._n_candidates,
+                                           random_state=self._random_state)
+        ]
+        self.__resume(self.__config(candidates, X, y))
+
+        self._deadline = time.monotonic() + self._time_budget if self._time_budget else None
+        permutation = np.random.default_rng(self._random_state).permutation(len(y))
+
+        survivors = list(range(len(candidates)))
+        n_samples = min(self._min_samples, len(y))
+        best = None
+
+        # One set of workers serves every fold of every rung
+        with Parallel(n_jobs=self._n_jobs) as parallel:
+            for rung in range(math.ceil(math.log(max(len(candidates), 1), self._factor)) + 1):
+                subset = permutation[:n_samples]
+                folds = list(StratifiedKFold(self._cv, shuffle=True, random_state=self._random_state)
+                             .split(X[subset], y[subset]))
+                folds = [(subset[train], subset[test]) for train, test in folds]
+
+                promoted = max(math.ceil(len(survivors) / self._factor), 1)
+                rung_scores = []
+
+                for candidate in survivors:
+                    if (rung, candidate) in self._cancelled:
+                        continue
+
+                    top_scores = sorted((score for _, score in rung_scores), reverse=True)
+                    cutoff = top_scores[promoted - 1] if len(top_scores) >= promoted else None
+
+                    score = self.__evaluate(parallel, rung, candidate, candidates[candidate], X, y, folds, cutoff)
+                    if score is not None:
+                        rung_scores.append((candidate, score))
+                        self.results_.append({'rung': rung, 'candidate': candidate, 'n_samples': n_samples,
+                                              'params': candidates[candidate], 'score': score})
+                    if self.__out_of_time():
+                        break
+
+                if len(rung_scores) == 0:
+                    break
+
+                rung_scores.sort(key=lambda item: item[1], reverse=True)
+                best = rung_scores[0]
+                print(f'Halving search rung {rung}: {len(rung_scores)}/{len(survivors)} candidates on {n_samples} '
+                      f'samples, best score {best[1]:.4f}.')
+
+                if self.__out_of_time():
+                    print('Halving search ran out of its time budget, keeping the best candidate so far.')
+                    break
+                if len(survivors) == 1 or n_samples == len(y):
+                    break
+
+                survivors = [candidate for candidate, _ in rung_scores[:promoted]]
+                n_samples = min(n_samples * self._factor, len(y))
+
+        if best is None:
+            raise RuntimeError('Halving search ran out of time before any candidate was fully evaluated.')
+
+        self.best_params_ = candidates[best[0]]
+        self.best_score_ = best[1]
+        self.best_estimator_ = clone(self._estimator).set_params(**self.best_params_).fit(X, y)
+
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, y):
+        return self.best_estimator_.score(X, y)
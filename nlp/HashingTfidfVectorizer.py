@@ -0,0 +1,57 @@
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class HashingTfidfVectorizer(TransformerMixin, BaseEstimator):
+    def __init__(self, tokenizer=None, stop_words=None, lowercase=True, n_features=2 ** 18, alternate_sign=False):
+        self.tokenizer = tokenizer
+        self.stop_words = stop_words
+        self.lowercase = lowercase
+        self.n_features = n_features
+        self.alternate_sign = alternate_sign
+
+    def __hashing(self):
+        return HashingVectorizer(tokenizer=self.tokenizer, stop_words=self.stop_words, lowercase=self.lowercase,
+                                 n_features=self.n_features, alternate_sign=self.alternate_sign, norm=None)
+
+    def __update_idf(self):
+        # Same smoothed IDF as TfidfVectorizer, computed from counts that can be summed across chunks
+        self.idf_ = np.log((1 + self.n_documents_) / (1 + self.document_frequency_)) + 1
+
+    def partial_fit(self, X, y=None):
+        if not hasattr(self, 'hashing_'):
+            self.hashing_ = self.__hashing()
+            self.document_frequency_ = np.zeros(self.n_features, dtype=np.int64)
+            self.n_documents_ = 0
+
+        counts = self.hashing_.transform(X)
+        self.document_frequency_ += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents_ += counts.shape[0]
+        self.__update_idf()
+
+        return self
+
+    def fit(self, X, y=None):
+        for attr in ['hashing_', 'document_frequency_', 'n_documents_', 'idf_']:
+            if hasattr(self, attr):
+                delattr(self, attr)
+        return self.partial_fit(X)
+
+    def merge(self, other):
+        # Vectorizers fitted on separate chunks of a corpus add up to one fitted on all of it
+        if other.get_params() != self.get_params():
+            raise ValueError('Only vectorizers with the same parameters can be merged.')
+
+        self.document_frequency_ = self.document_frequency_ + other.document_frequency_
+        self.n_documents_ += other.n_documents_
+        self.__update_idf()
+
+        return self
+
+    def transform(self, X):
+        # The IDF weights scale the stored counts in place, no n_features x n_features diagonal product
+        features = self.hashing_.transform(X)
+        features.data *= self.idf_[features.indices]
+        return normalize(features, copy=False)
@@ -1,22 +1,93 @@
+import sys
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from defs import Constants
+
+try:
+    import pyarrow  # noqa: F401
+
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'string'
+
+
+def peak_rss_mb():
+    # The resource module only exists on Unix, and macOS reports the peak in bytes where Linux uses kilobytes
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1024 ** 2 if sys.platform == 'darwin' else peak_rss / 1024
 
 
 class InputParser:
-    def __init__(self):
+    def __init__(self, chunk_size=Constants.DATASET_CHUNK_SIZE, random_state=None):
         self._dataset = None
+        self._chunk_size = chunk_size
+        self._random_state = random_state
+        self._memory_report = None
+
+    def __read_chunks(self, path, csv_columns, label_column):
+        dtypes = {col: 'category' if col == label_column else STRING_DTYPE for col in csv_columns}
+        reader = pd.read_csv(path['path'], usecols=csv_columns, delimiter=path['delimiter'], dtype=dtypes,
+                             chunksize=self._chunk_size)
+
+        for i, chunk in enumerate(reader):
+            if i == 0:
+                chunk = chunk.drop(index=0)
+            yield chunk.dropna(subset=csv_columns)  # remove invalid entries
+
+    def read_from_file(self, csv_paths, csv_columns, label_column=None):
+        chunks = [chunk for path in csv_paths for chunk in self.__read_chunks(path, csv_columns, label_column)]
+
+        # Chunks carry their own categories, merging them directly would fall back to an object column
+        self._dataset = pd.DataFrame({
+            col: union_categoricals([chunk[col] for chunk in chunks]) if col == label_column
+            else pd.concat([chunk[col] for chunk in chunks], ignore_index=True)
+            for col in csv_columns
+        })
+
+        self._memory_report = {
+            'entries': len(self._dataset),
+            'dataset_mb': self._dataset.memory_usage(deep=True).sum() / 1024 ** 2,
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+        peak_memory = f', peak memory so far {self._memory_report["peak_rss_mb"]:.1f} MB' \
+            if self._memory_report['peak_rss_mb'] is not None else ''
+        print(f'Read {self._memory_report["entries"]} entries using {self._memory_report["dataset_mb"]:.1f} MB'
+              f'{peak_memory}.')
+
+    def get_split_indices(self, training_percent, label_column):
+        rng = np.random.default_rng(self._random_state)
+        labels = self._dataset[label_column]
+        codes = labels.cat.codes.to_numpy() if labels.dtype == 'category' else pd.factorize(labels)[0]
+
+        permutation = rng.permutation(len(codes))
+        permuted_codes = codes[permutation]
+        training_indices, testing_indices = [], []
 
-    def read_from_file(self, csv_paths, csv_columns):
-        self._dataset = pd.DataFrame(columns=csv_columns)
+        # Every label is split on its own, so both sets keep the label distribution of the whole dataset
+        for code in np.unique(codes):
+            indices = permutation[permuted_codes == code]
+            training_entries = int(len(indices) * training_percent)
+            training_indices.append(indices[:training_entries])
+            testing_indices.append(indices[training_entries:])
 
-        for path in csv_paths:
-            curr_dataset = pd.read_csv(path['path'], usecols=csv_columns, delimiter=path['delimiter'])
-            curr_dataset.drop(index=0, inplace=True)
-            self._dataset = pd.concat([self._dataset, curr_dataset], ignore_index=True)
+        return rng.permutation(np.concatenate(training_indices)), rng.permutation(np.concatenate(testing_indices))
 
-        self._dataset.dropna(subset=csv_columns, inplace=True)  # remove invalid entries
+    def column(self, column):
+        return self._dataset[column]
 
-    def get_organized_data(self, training_percent):
-        self._dataset = self._dataset.sample(frac=1)  # shuffle the input
-        training_entries = int(len(self._dataset) * training_percent)
+    def take(self, indices, column):
+        # Only the requested column is gathered, the split itself stays a pair of index arrays
+        return self._dataset[column].take(indices)
 
-        return self._dataset[:training_entries], self._dataset[training_entries + 1:]
+    @property
+    def memory_report(self):
+        return self._memory_report
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+from sklearn.ensemble import StackingClassifier
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import LinearSVC, SVC
+from sklearn.utils import Bunch
+
+from nlp.HashingTfidfVectorizer import HashingTfidfVectorizer
+from nlp.TextPreprocessor import identity_tokenizer
+
+
+class ModelArtifact:
+    FORMAT_VERSION = 1
+    MANIFEST_FILE = 'manifest.json'
+    ARRAYS_DIR = 'arrays'
+
+    # Only these classes and callables can be rebuilt, nothing else is ever imported or executed on load
+    ESTIMATORS = {cls.__name__: cls for cls in [
+        Pipeline, TfidfVectorizer, TfidfTransformer, StackingClassifier, LogisticRegression, SVC, LabelEncoder,
+        LinearSVC, Nystroem, HashingVectorizer, HashingTfidfVectorizer, SGDClassifier
+    ]}
+    # Derived on use and rebuilt by the estimators themselves, they are not part of an artifact
+    TRANSIENT_STATE = ['_stop_words_id', 'loss_function_']
+    CALLABLES = {
+        'identity_tokenizer': identity_tokenizer
+    }
+
+    def __init__(self, model, enc, manifest):
+        self.model = model
+        self.enc = enc
+        self.manifest = manifest
+
+    @staticmethod
+    def is_artifact(path):
+        return os.path.isfile(os.path.join(path, ModelArtifact.MANIFEST_FILE))
+
+    @staticmethod
+    def __is_vocabulary(value):
+        return len(value) > 0 and all(type(key) is str for key in value) and \
+            sorted(int(index) for index in value.values()) == list(range(len(value)))
+
+    @staticmethod
+    def __save_array(array, arrays, path):
+        name = f'{len(arrays)}.npy'
+        np.save(os.path.join(path, ModelArtifact.ARRAYS_DIR, name), np.ascontiguousarray(array), allow_pickle=False)
+        arrays.append(name)
+        return name
+
+    @staticmethod
+    def __encode(value, arrays, path, attr):
+        encode = lambda v, a: ModelArtifact.__encode(v, arrays, path, a)
+
+        if value is None or type(value) in [bool, int, float, str]:
+            return value
+        if isinstance(value, np.generic):
+            return {'__scalar__': value.dtype.str, 'value': value.item()}
+        if isinstance(value, type) and issubclass(value, np.generic):
+            return {'__dtype__': np.dtype(value).str}
+        if isinstance(value, np.ndarray):
+            if value.dtype == object:
+                if not all(isinstance(item, str) for item in value.flat):
+                    raise ValueError(f'Cannot export object array {attr}.')
+                return {'__array__': ModelArtifact.__save_array(value.astype(str), arrays, path), 'object': True}
+            return {'__array__': ModelArtifact.__save_array(value, arrays, path)}
+        if sp.issparse(value):
+            value = value.tocsr()
+            return {
+                '__sparse__': 'csr',
+                'shape': list(value.shape),
+                'data': ModelArtifact.__save_array(value.data, arrays, path),
+                'indices': ModelArtifact.__save_array(value.indices, arrays, path),
+                'indptr': ModelArtifact.__save_array(value.indptr, arrays, path)
+            }
+        if isinstance(value, tuple):
+            return {'__tuple__': [encode(item, f'{attr}[{i}]') for i, item in enumerate(value)]}
+        if isinstance(value, list):
+            return [encode(item, f'{attr}[{i}]') for i, item in enumerate(value)]
+        if isinstance(value, (set, frozenset)):
+            return {'__set__': [encode(item, f'{attr}[]') for item in sorted(value, key=str)]}
+        if isinstance(value, Bunch):
+            return {'__bunch__': [[key, encode(item, f'{attr}.{key}')] for key, item in value.items()]}
+        if isinstance(value, dict):
+            # A term -> column dict (a fitted vocabulary) is stored as the array of its terms
+            if ModelArtifact.__is_vocabulary(value):
+                terms = sorted(value, key=value.get)
+                return {'__vocabulary__': ModelArtifact.__save_array(np.array(terms, dtype=str), arrays, path)}
+            return {'__dict__': [[encode(key, attr), encode(item, f'{attr}.{key}')] for key, item in value.items()]}
+        if callable(value) and getattr(value, '__name__', None) in ModelArtifact.CALLABLES:
+            return {'__callable__': value.__name__}
+        if type(value).__name__ in ModelArtifact.ESTIMATORS:
+            state = value.__getstate__() if hasattr(value, '__getstate__') else value.__dict__
+            state = {key: item for key, item in state.items() if key not in ModelArtifact.TRANSIENT_STATE}
+            return {
+                '__estimator__': type(value).__name__,
+                'state': {key: encode(item, f'{attr}.{key}') for key, item in state.items()}
+            }
+
+        raise ValueError(f'Cannot export {attr} of type {type(value).__name__}.')
+
+    @staticmethod
+    def __decode(node, arrays):
+        decode = lambda n: ModelArtifact.__decode(n, arrays)
+
+        if isinstance(node, list):
+            return [decode(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if '__scalar__' in node:
+            return np.dtype(node['__scalar__']).type(node['value'])
+        if '__dtype__' in node:
+            return np.dtype(node['__dtype__']).type
+        if '__array__' in node:
+            array = arrays(node['__array__'])
+            return array.astype(object) if node.get('object') else array
+        if '__sparse__' in node:
+            return sp.csr_matrix((arrays(node['data']), arrays(node['indices']), arrays(node['indptr'])),
+                                 shape=tuple(node['shape']), copy=False)
+        if '__tuple__' in node:
+            return tuple(decode(item) for item in node['__tuple__'])
+        if '__set__' in node:
+            return set(decode(item) for item in node['__set__'])
+        if '__bunch__' in node:
+            return Bunch(**{key: decode(item) for key, item in node['__bunch__']})
+        if '__vocabulary__' in node:
+            return {str(term): i for i, term in enumerate(arrays(node['__vocabulary__']))}
+        if '__dict__' in node:
+            return {decode(key): decode(item) for key, item in node['__dict__']}
+        if '__callable__' in node:
+            return ModelArtifact.CALLABLES[node['__callable__']]
+        if '__estimator__' in node:
+            cls = ModelArtifact.ESTIMATORS[node['__estimator__']]
+            estimator = cls.__new__(cls)
+            estimator.__setstate__({key: decode(item) for key, item in node['state'].items()})
+            return estimator
+
+        raise ValueError(f'Unknown artifact node {list(node.keys())}.')
+
+    @staticmethod
+    def __file_checksum(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def __checksum(file_checksums):
+        digest = hashlib.sha256()
+        for name in sorted(file_checksums):
+            digest.update(f'{name}:{file_checksums[name]}\n'.encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def export(model, enc, path, score=None, metadata=None):
+        tmp_path = f'{path.rstrip(os.sep)}.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(os.path.join(tmp_path, ModelArtifact.ARRAYS_DIR))
+
+        arrays = []
+        model_node = ModelArtifact.__encode(model, arrays, tmp_path, 'model')
+        enc_node = ModelArtifact.__encode(enc, arrays, tmp_path, 'enc')
+
+        file_checksums = {
+            name: ModelArtifact.__file_checksum(os.path.join(tmp_path, ModelArtifact.ARRAYS_DIR, name))
+            for name in arrays
+        }
+
+        manifest = {
+            'format_version': ModelArtifact.FORMAT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'classes': [str(label) for label in enc.classes_],
+            'score': float(score) if score is not None else None,
+            'metadata': metadata,
+            'checksum': ModelArtifact.__checksum(file_checksums),
+            'arrays': file_checksums,
+            'model': model_node,
+            'enc': enc_node
+        }
+
+        with open(os.path.join(tmp_path, ModelArtifact.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        # The previous artifact is renamed aside rather than deleted first, so path is only ever missing between
+        # two renames, never while a whole directory is being removed
+        old_path = f'{path.rstrip(os.sep)}.old'
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+
+    @staticmethod
+    def load(path, mmap_mode='r', verify=True):
+        with open(os.path.join(path, ModelArtifact.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get('format_version') != ModelArtifact.FORMAT_VERSION:
+            raise ValueError(f'Unsupported model artifact version {manifest.get("format_version")}.')
+
+        arrays_path = os.path.join(path, ModelArtifact.ARRAYS_DIR)
+
+        if verify:
+            file_checksums = {
+                name: ModelArtifact.__file_checksum(os.path.join(arrays_path, name)) for name in manifest['arrays']
+            }
+            if file_checksums != manifest['arrays'] or \
+                    ModelArtifact.__checksum(file_checksums) != manifest['checksum']:
+                raise ValueError(f'Model artifact {path} failed checksum verification.')
+
+        arrays = lambda name: np.load(os.path.join(arrays_path, name), mmap_mode=mmap_mode, allow_pickle=False)
+
+        model = ModelArtifact.__decode(manifest['model'], arrays)
+        enc = ModelArtifact.__decode(manifest['enc'], arrays)
+
+        return ModelArtifact(model, enc, {
+            key: value for key, value in manifest.items() if key not in ['model', 'enc']
+        })
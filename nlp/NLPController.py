@@ -1,38 +1,35 @@
-import multiprocessing
+import json
 import os
 import pickle
+import time
 import warnings
 
-import dask.dataframe as ddf
-import nltk
+import numpy as np
+
+from joblib import Memory
 from scipy.stats import uniform
 from sklearn.ensemble import StackingClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.base import clone
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.model_selection import RandomizedSearchCV
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import LabelEncoder
-from sklearn.svm import SVC
+from sklearn.svm import LinearSVC, SVC
 
 from defs import Constants
-from nlp import InputParser, TextPreprocessor
+from nlp import CorpusCache, HalvingSearch, HashingTfidfVectorizer, InputParser, ModelArtifact, NltkResources, \
+    PreprocessingPool, SharedMatrix, SpellEngine, TextPreprocessor
+from nlp.TextPreprocessor import identity_tokenizer, token_array
 
 warnings.filterwarnings("ignore")
 
 
 class NLPController:
     def __init_nltk(self, nltk_path):
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-
-        # Verify installation and perform it if not present
-        if os.path.isdir(nltk_path):
-            nltk.data.path.append(f'{nltk_path}/nltk_data')
-        else:
-            os.mkdir(nltk_path)
-            nltk.download('wordnet', f"{nltk_path}/nltk_data")
-            nltk.download('omw-1.4', f"{nltk_path}/nltk_data/")
-            nltk.data.path.append(f'{nltk_path}/nltk_data')
+        # Resources are looked up locally first and only downloaded into nltk_path when missing, on first use
+        NltkResources.configure(data_path=f'{nltk_path}/nltk_data')
 
     def __init__(self, nltk_path):
         self._model = None
@@ -41,10 +38,18 @@ class NLPController:
 
         self._testing_set = None
         self._training_set = None
+        self._testing_indices = None
+        self._training_indices = None
+        self._labels = None
 
         self.__init_nltk(nltk_path)
-        self._input_parser = InputParser()
+        SpellEngine.configure(cache_path=Constants.SPELL_CACHE_PATH)
+        self._input_parser = InputParser(chunk_size=Constants.DATASET_CHUNK_SIZE,
+                                         random_state=Constants.DATASET_SPLIT_SEED)
         self._text_preprocessor = TextPreprocessor()
+        self._preprocessing_pool = PreprocessingPool(workers=Constants.PREPROCESSING_WORKERS,
+                                                     chunk_size=Constants.PREPROCESSING_CHUNK_SIZE,
+                                                     spell_cache_path=Constants.SPELL_CACHE_PATH)
 
     def __classify_emotion(self, emotion):
         if emotion in Constants.EMOTIONS:
@@ -57,50 +62,74 @@ class NLPController:
             return 'disgust'
         return 'invalid'
 
-    def __reduce_emotions_array(self, df, col):
-        df[col].apply(str.lower)
-        df[col] = df[col].apply(self.__classify_emotion)
-        mask = df[col].isin(Constants.EMOTIONS)
-        df = df[mask]
-        return df
-
     def __prepare_dataset(self, csv_paths, csv_columns, training_percent):
         print('Preparing dataset.')
 
-        self._input_parser.read_from_file(csv_paths=csv_paths, csv_columns=csv_columns)
-        self._training_set, self._testing_set = self._input_parser.get_organized_data(training_percent)
+        self._input_parser.read_from_file(csv_paths=csv_paths, csv_columns=csv_columns,
+                                          label_column=Constants.DATASET_Y_COL)
+        training_indices, testing_indices = self._input_parser.get_split_indices(training_percent,
+                                                                                 Constants.DATASET_Y_COL)
 
-        self._training_set = self.__reduce_emotions_array(self._training_set, Constants.DATASET_Y_COL)
-        self._testing_set = self.__reduce_emotions_array(self._testing_set, Constants.DATASET_Y_COL)
+        # Labels are reduced once over the whole column (a categorical maps each category once), the split stays a
+        # pair of index arrays and rows are only gathered when preprocessing reads them
+        self._labels = self._input_parser.column(Constants.DATASET_Y_COL).map(self.__classify_emotion)
+        valid = self._labels.isin(Constants.EMOTIONS).to_numpy()
+        self._training_indices = training_indices[valid[training_indices]]
+        self._testing_indices = testing_indices[valid[testing_indices]]
 
         print('Finished preparing dataset.')
 
-    def __preprocess_dataset_entries(self, x_col, y_col):
+    def __preprocess_dataset_entries(self, x_col):
         print('Preprocessing dataset.')
 
-        self._text_preprocessor.set_tested_col_tag(Constants.DATASET_X_COL)
+        corpus_cache = CorpusCache(Constants.CORPUS_CACHE_PATH, self._text_preprocessor.config,
+                                   [path['path'] for path in Constants.DATASETS])
+        corpus_cache.load()
+
+        training_texts = self._input_parser.take(self._training_indices, x_col).tolist()
+        testing_texts = self._input_parser.take(self._testing_indices, x_col).tolist()
+        training_tokens = corpus_cache.lookup(training_texts)
+        testing_tokens = corpus_cache.lookup(testing_texts)
 
-        ddf_training_set = ddf.from_pandas(self._training_set, npartitions=multiprocessing.cpu_count())
-        self._training_set = ddf_training_set.map_partitions(self._text_preprocessor.preprocess_df,
-                                                             meta=self._training_set)
-        self._training_set = self._training_set.compute()
+        # Only texts never preprocessed with this configuration go through the pool, train and test together
+        missing_texts = list(dict.fromkeys(
+            text for text, tokens in zip(training_texts + testing_texts, training_tokens + testing_tokens)
+            if tokens is None
+        ))
+        cached_rows = sum(tokens is not None for tokens in training_tokens + testing_tokens)
+        print(f'Preprocessing {len(missing_texts)} new texts, reusing {cached_rows} cached rows.')
 
-        ddf_testing_set = ddf.from_pandas(self._testing_set, npartitions=multiprocessing.cpu_count())
-        self._testing_set = ddf_testing_set.map_partitions(self._text_preprocessor.preprocess_df,
-                                                           meta=self._testing_set)
-        self._testing_set = self._testing_set.compute()
+        if len(missing_texts) > 0:
+            processed = dict(zip(missing_texts, self._preprocessing_pool.process(missing_texts)))
+            corpus_cache.update(processed.keys(), processed.values())
+            print(f'Preprocessing pool: {self._preprocessing_pool.stats}')
+
+            training_tokens = [tokens if tokens is not None else processed[text]
+                               for text, tokens in zip(training_texts, training_tokens)]
+            testing_tokens = [tokens if tokens is not None else processed[text]
+                              for text, tokens in zip(testing_texts, testing_tokens)]
+
+        corpus_cache.save()
+        print(f'Corpus cache: {corpus_cache.stats}')
+
+        spell_engine = SpellEngine.get_instance()
+        spell_engine.save()
+        print(f'Spell correction cache: {spell_engine.stats}')
+
+        training_labels = self._labels.take(self._training_indices).to_numpy()
+        testing_labels = self._labels.take(self._testing_indices).to_numpy()
 
         self._enc = LabelEncoder()
-        self._enc.fit(self._training_set[y_col].values)
+        self._enc.fit(training_labels)
 
         self._training_set = {
-            'x': self._training_set[x_col].values,
-            'y': self._enc.transform(self._training_set[y_col].values),
+            'x': token_array(training_tokens),
+            'y': self._enc.transform(training_labels),
         }
 
         self._testing_set = {
-            'x': self._testing_set[x_col].values,
-            'y': self._enc.transform(self._testing_set[y_col].values),
+            'x': token_array(testing_tokens),
+            'y': self._enc.transform(testing_labels),
         }
 
         if not os.path.exists(os.path.dirname(Constants.PARSED_DATASET_PATH)):
@@ -117,8 +146,79 @@ class NLPController:
     def identity_tokenizer(self, text):
         return text
 
-    def __train_model_util(self):
-        print('Training model.')
+    def __tfidf_cache_entries(self, cache_path):
+        entries = {}
+        for root, _, files in os.walk(cache_path):
+            if 'metadata.json' in files:
+                with open(os.path.join(root, 'metadata.json'), 'r', encoding='utf-8') as f:
+                    entries[root] = json.load(f).get('duration', 0.0)
+        return entries
+
+    def __tfidf_cache_report(self, cache_path, cached_fits, fits):
+        entries = self.__tfidf_cache_entries(cache_path)
+        new_fits = {entry: duration for entry, duration in entries.items() if entry not in cached_fits}
+        size = sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(cache_path) for file in files)
+
+        reused = max(fits - len(new_fits), 0)
+        durations = list(new_fits.values()) or list(entries.values())
+        mean_duration = sum(durations) / len(durations) if durations else 0.0
+
+        return {
+            'entries': len(entries),
+            'bytes': size,
+            'fits': fits,
+            'computed': len(new_fits),
+            'reused': reused,
+            'seconds_saved': reused * mean_duration
+        }
+
+    def __build_vectorizer(self, vectorizer):
+        if vectorizer == 'hashing':
+            # Hashed features need no vocabulary, only the IDF weights of the fixed number of features are fitted
+            return HashingTfidfVectorizer(tokenizer=identity_tokenizer, stop_words='english', lowercase=False,
+                                          n_features=Constants.HASHING_FEATURES,
+                                          alternate_sign=Constants.HASHING_ALTERNATE_SIGN)
+
+        return TfidfVectorizer(tokenizer=identity_tokenizer, stop_words='english', lowercase=False)
+
+    def __build_count_vectorizer(self):
+        # Same features as the hashing __build_vectorizer before the TF-IDF weighting, which TfidfTransformer adds
+        return HashingVectorizer(tokenizer=identity_tokenizer, stop_words='english', lowercase=False,
+                                 n_features=Constants.HASHING_FEATURES, alternate_sign=Constants.HASHING_ALTERNATE_SIGN,
+                                 norm=None)
+
+    def __shared_matrix_search(self, pipeline, hyper_params, n_jobs):
+        # Tokens are counted once into memory mapped files, the search workers map the same pages instead of each
+        # unpickling the token lists and hashing them again on every fold. Fitting still copies a fold's rows (and
+        # their TF-IDF weights) into the worker, so search memory keeps growing by about one fold per worker.
+        started_at = time.perf_counter()
+        counts = self.__build_count_vectorizer().fit_transform(self._training_set['x'])
+        SharedMatrix.dump(counts, self._training_set['y'], Constants.SHARED_MATRIX_PATH)
+        del counts
+
+        x, y = SharedMatrix.load(Constants.SHARED_MATRIX_PATH)
+        matrix_mb = (x.data.nbytes + x.indices.nbytes + x.indptr.nbytes + y.nbytes) / 1024 ** 2
+        print(f'Shared a {x.shape[0]}x{x.shape[1]} count matrix ({matrix_mb:.1f} MB) in '
+              f'{time.perf_counter() - started_at:.1f} s.')
+
+        # Only the IDF weights are fitted per fold. Hashed features have no vocabulary, so nothing is learned from the
+        # validation folds and best_score_ stays comparable with the other search paths
+        search = RandomizedSearchCV(
+            Pipeline([('tfidf', TfidfTransformer()), ('model', pipeline.named_steps['model'])]),
+            hyper_params, cv=7, refit=False, verbose=3, n_jobs=n_jobs
+        )
+
+        started_at = time.perf_counter()
+        search.fit(x, y)
+        print(f'Searched {len(search.cv_results_["params"])} candidates in {time.perf_counter() - started_at:.1f} s '
+              f'with n_jobs={n_jobs}, best cross-validation score {search.best_score_:.4f}.')
+
+        # The served model keeps its usual vectorizer and stack steps, it is fitted once on the token lists
+        model = clone(pipeline).set_params(memory=None, **search.best_params_)
+        return model.fit(self._training_set['x'], self._training_set['y'])
+
+    def __train_model_util(self, search, vectorizer, time_budget, n_jobs):
+        print(f'Training model with {search} search and {vectorizer} features.')
 
         self.__prepare_dataset(
             csv_paths=Constants.DATASETS,
@@ -127,15 +227,19 @@ class NLPController:
         )
 
         self.__preprocess_dataset_entries(
-            x_col=Constants.DATASET_X_COL,
-            y_col=Constants.DATASET_Y_COL
+            x_col=Constants.DATASET_X_COL
         )
 
-        self._tfidf = TfidfVectorizer(tokenizer=self.identity_tokenizer, stop_words='english', lowercase=False)
-        self._tfidf.fit_transform(self._training_set['x'])
+        self._tfidf = self.__build_vectorizer(vectorizer)
+
+        # No vectorizer parameter is searched, so each fold's TF-IDF matrix is fitted once and shared by all
+        # candidates (and the search workers) through the cache directory
+        tfidf_cache = Memory(Constants.TFIDF_CACHE_PATH, verbose=0)
+        cached_fits = self.__tfidf_cache_entries(Constants.TFIDF_CACHE_PATH)
 
         self._model = Pipeline(
-            [
+            memory=tfidf_cache,
+            steps=[
                 ('vectorizer', self._tfidf),
                 ('model', StackingClassifier(
                     estimators=[
@@ -158,16 +262,50 @@ class NLPController:
             'model__svm__max_iter': [5000, 10000],
         }
 
-        self._model = RandomizedSearchCV(
-            self._model, hyper_params, cv=7, refit=True, verbose=3, n_jobs=-1
-        )
+        # A count matrix shared across folds would need a vocabulary fitted on the whole training split, leaking the
+        # validation folds into every fold's features, so only hashed features are shared
+        shared_matrix = search == 'random' and Constants.SEARCH_SHARED_MATRIX and vectorizer == 'hashing'
+        if search == 'random' and Constants.SEARCH_SHARED_MATRIX and not shared_matrix:
+            print(f'The shared count matrix needs hashed features, every search worker gets its own copy of the '
+                  f'{vectorizer} training data.')
+
+        if search == 'halving':
+            # Candidates are first compared on a small sample, only the best ones get to see more of the data
+            self._model = HalvingSearch(
+                self._model, hyper_params, n_candidates=Constants.HALVING_CANDIDATES, factor=Constants.HALVING_FACTOR,
+                min_samples=Constants.HALVING_MIN_SAMPLES, cv=Constants.HALVING_CV,
+                time_budget=time_budget, log_path=Constants.SEARCH_LOG_PATH, random_state=Constants.SEARCH_SEED,
+                n_jobs=n_jobs
+            )
+        elif shared_matrix:
+            self._model = self.__shared_matrix_search(self._model, hyper_params, n_jobs)
+        else:
+            self._model = RandomizedSearchCV(
+                self._model, hyper_params, cv=7, refit=True, verbose=3, n_jobs=n_jobs
+            )
 
-        self._model.fit(
-            self._training_set['x'],
-            self._training_set['y']
-        )
+        if shared_matrix:
+            print('Finished training model.')
+        else:
+            self._model.fit(
+                self._training_set['x'],
+                self._training_set['y']
+            )
 
-        print('Finished training model.')
+            # Every fold of every candidate fits the vectorizer once, plus once for the refit
+            if search == 'halving':
+                vectorizer_fits = self._model.n_fits_ + 1
+            else:
+                vectorizer_fits = len(self._model.cv_results_['params']) * self._model.n_splits_ + 1
+
+            # The cache directory only matters while searching, the refit model is served and exported without it
+            self._model.best_estimator_.set_params(memory=None)
+
+            print('Finished training model.')
+            print(f'TF-IDF cache: '
+                  f'{self.__tfidf_cache_report(Constants.TFIDF_CACHE_PATH, cached_fits, vectorizer_fits)}')
+
+        tfidf_cache.reduce_size(bytes_limit=Constants.TFIDF_CACHE_MAX_BYTES)
         print('Scoring model.')
 
         self._model_score = self._model.score(
@@ -177,14 +315,19 @@ class NLPController:
 
         print('Finished scoring model.')
 
-    def train_model(self, path=None):
+    def train_model(self, path=None, artifact_path=None, search=Constants.MODEL_SEARCH, fast_artifact_path=None,
+                    fast_method=Constants.FAST_MODEL_METHOD, vectorizer=Constants.VECTORIZER,
+                    search_time_budget=Constants.SEARCH_TIME_BUDGET, search_n_jobs=Constants.SEARCH_N_JOBS):
+        trained = False
+
         if path and os.path.isfile(path):
             save_obj = pickle.load(open(path, 'rb'))
             self._model = save_obj['model']
             self._enc = save_obj['enc']
             self._model_score = save_obj['score']
         else:
-            self.__train_model_util()
+            self.__train_model_util(search, vectorizer, search_time_budget, search_n_jobs)
+            trained = True
             pickle.dump({
                 'model': self._model,
                 'enc': self._enc,
@@ -192,11 +335,244 @@ class NLPController:
                 'score': self._model_score
             }, open(path, 'wb+'))
 
+        if artifact_path and (trained or not ModelArtifact.is_artifact(artifact_path)):
+            self.export_model(artifact_path)
+
+        if fast_artifact_path and (trained or not ModelArtifact.is_artifact(fast_artifact_path)):
+            self.export_fast_model(fast_artifact_path, fast_method)
+
+    def export_model(self, path):
+        print('Exporting model.')
+
+        # Only the refit estimator is needed for serving, not the search results around it
+        model = getattr(self._model, 'best_estimator_', self._model)
+        ModelArtifact.export(model, self._enc, path, score=self._model_score)
+
+        print(f'Finished exporting model to {path}.')
+
+    def __load_parsed_dataset(self):
+        if isinstance(self._training_set, dict):
+            return self._training_set, self._testing_set
+
+        # A model loaded from disk was trained in an earlier run, its preprocessed splits were saved alongside
+        save_obj = pickle.load(open(Constants.PARSED_DATASET_PATH, 'rb'))
+        return save_obj['training'], save_obj['testing']
+
+    def __single_predict_latency(self, model, x, samples=200):
+        started_at = time.perf_counter()
+        for entry in x[:samples]:
+            model.predict([entry])
+        return (time.perf_counter() - started_at) / max(min(samples, len(x)), 1)
+
+    def export_fast_model(self, path, method=Constants.FAST_MODEL_METHOD):
+        print(f'Exporting fast model using {method}.')
+
+        model = getattr(self._model, 'best_estimator_', self._model)
+        training_set, testing_set = self.__load_parsed_dataset()
+
+        vectorizer = model.named_steps['vectorizer']
+        features = vectorizer.transform(training_set['x'])
+
+        if method == 'nystroem':
+            # Same kernel as the stack's SVC, approximated so that a linear model can be fitted on top
+            svm = model.named_steps['model'].named_estimators_['svm']
+            kernel = Nystroem(kernel=svm.kernel, gamma=svm.gamma, degree=svm.degree, coef0=svm.coef0,
+                              n_components=min(Constants.FAST_MODEL_COMPONENTS, features.shape[0]), random_state=0)
+            features = kernel.fit_transform(features)
+            steps = [('vectorizer', vectorizer), ('kernel', kernel)]
+            targets = training_set['y']
+        else:
+            # Distilled from the stack, the linear model learns to reproduce its decisions rather than the labels
+            steps = [('vectorizer', vectorizer)]
+            targets = model.predict(training_set['x'])
+
+        linear_model = LinearSVC(C=Constants.FAST_MODEL_C)
+        linear_model.fit(features, targets)
+        fast_model = Pipeline(steps + [('model', linear_model)])
+
+        stack_score = model.score(testing_set['x'], testing_set['y'])
+        fast_score = fast_model.score(testing_set['x'], testing_set['y'])
+        agreement = (fast_model.predict(testing_set['x']) == model.predict(testing_set['x'])).mean()
+
+        print(f'Fast model accuracy {fast_score:.4f} against {stack_score:.4f} for the stack '
+              f'(delta {fast_score - stack_score:+.4f}, agreement {agreement:.4f}).')
+        print(f'Single message predict latency: '
+              f'{self.__single_predict_latency(fast_model, testing_set["x"]) * 1000:.2f} ms fast, '
+              f'{self.__single_predict_latency(model, testing_set["x"]) * 1000:.2f} ms stack.')
+
+        ModelArtifact.export(fast_model, self._enc, path, score=fast_score)
+
+        print(f'Finished exporting fast model to {path}.')
+
+    def __vectorizer_report(self, model, testing_set):
+        vectorizer = model.named_steps['vectorizer']
+        state = pickle.dumps(vectorizer)
+
+        started_at = time.perf_counter()
+        pickle.loads(state)
+        load_seconds = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        vectorizer.transform(testing_set['x'])
+        transform_seconds = time.perf_counter() - started_at
+
+        return {
+            'accuracy': model.score(testing_set['x'], testing_set['y']),
+            'predict_ms': self.__single_predict_latency(model, testing_set['x']) * 1000,
+            'transform_rows_per_second': len(testing_set['x']) / transform_seconds,
+            'state_mb': len(state) / 1024 ** 2,
+            'load_ms': load_seconds * 1000
+        }
+
+    def compare_vectorizers(self):
+        print('Comparing vectorizers.')
+
+        model = getattr(self._model, 'best_estimator_', self._model)
+        training_set, testing_set = self.__load_parsed_dataset()
+        current = 'hashing' if isinstance(model.named_steps['vectorizer'], HashingTfidfVectorizer) else 'tfidf'
+        other = 'tfidf' if current == 'hashing' else 'hashing'
+
+        # The trained classifier's parameters are refitted on the other features, the held-out split is shared
+        other_model = Pipeline([
+            ('vectorizer', self.__build_vectorizer(other)),
+            ('model', clone(model.named_steps['model']))
+        ])
+        other_model.fit(training_set['x'], training_set['y'])
+
+        reports = {current: self.__vectorizer_report(model, testing_set),
+                   other: self.__vectorizer_report(other_model, testing_set)}
+        for name, report in reports.items():
+            print(f'{name:<10}accuracy {report["accuracy"]:.4f}, predict {report["predict_ms"]:.2f} ms, '
+                  f'transform {report["transform_rows_per_second"]:.0f} rows/s, '
+                  f'state {report["state_mb"]:.2f} MB, load {report["load_ms"]:.1f} ms')
+
+        return reports
+
+    def __read_feedback(self, path, offset, labels):
+        # Only complete lines are consumed, a row still being appended is picked up by the next update
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+
+                # A malformed line is skipped like a row with an unknown label, the offset still moves past it
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                if not isinstance(row, dict):
+                    yield offset, None, None
+                    continue
+
+                label = str(row.get(Constants.DATASET_Y_COL, '')).lower()
+                if label not in labels:
+                    label = self.__classify_emotion(label)
+                text = row.get(Constants.DATASET_X_COL)
+
+                yield offset, text if text and label in labels else None, label
+
+    def __online_model(self, training_set, classes):
+        print('Bootstrapping online model from the training split.')
+
+        vectorizer = HashingTfidfVectorizer(tokenizer=identity_tokenizer, stop_words='english', lowercase=False,
+                                            n_features=Constants.HASHING_FEATURES,
+                                            alternate_sign=Constants.HASHING_ALTERNATE_SIGN)
+        # The IDF weights stay as fitted here, so that every later update lands in the same feature space
+        features = vectorizer.fit(training_set['x']).transform(training_set['x'])
+        classifier = SGDClassifier(alpha=Constants.ONLINE_ALPHA, random_state=0)
+
+        for epoch in range(Constants.ONLINE_BOOTSTRAP_EPOCHS):
+            order = np.random.default_rng(epoch).permutation(features.shape[0])
+            for start in range(0, len(order), Constants.ONLINE_BATCH_SIZE):
+                batch = order[start:start + Constants.ONLINE_BATCH_SIZE]
+                classifier.partial_fit(features[batch], training_set['y'][batch], classes=classes)
+
+        return Pipeline([('vectorizer', vectorizer), ('model', classifier)])
+
+    def update_model(self, feedback_path=Constants.FEEDBACK_PATH, artifact_path=Constants.ONLINE_MODEL_ARTIFACT_PATH,
+                     batch_size=Constants.ONLINE_BATCH_SIZE, eval_every=Constants.ONLINE_EVAL_EVERY):
+        training_set, testing_set = self.__load_parsed_dataset()
+        enc = self._enc if self._enc is not None else pickle.load(open(Constants.PARSED_DATASET_PATH, 'rb'))['enc']
+        progress = {'feedback_path': os.path.abspath(feedback_path), 'offset': 0, 'rows': 0, 'skipped': 0,
+                    'batches': 0, 'accuracy': None}
+
+        if ModelArtifact.is_artifact(artifact_path):
+            # Loaded into memory, the coefficients are updated in place
+            artifact = ModelArtifact.load(artifact_path, mmap_mode=None)
+            model = artifact.model
+            enc = artifact.enc
+            if not hasattr(model.named_steps['model'], 'partial_fit'):
+                raise ValueError(f'{artifact_path} does not hold an online model.')
+            if (artifact.manifest.get('metadata') or {}).get('feedback_path') == progress['feedback_path']:
+                progress = artifact.manifest['metadata']
+        else:
+            model = self.__online_model(training_set, np.arange(len(enc.classes_)))
+            progress['accuracy'] = model.score(testing_set['x'], testing_set['y'])
+            ModelArtifact.export(model, enc, artifact_path, score=progress['accuracy'], metadata=progress)
+            print(f'Online model starts with a held-out accuracy of {progress["accuracy"]:.4f}.')
+
+        if not os.path.isfile(feedback_path):
+            print(f'No feedback found at {feedback_path}.')
+            return progress
+        if os.path.getsize(feedback_path) < progress['offset']:
+            print(f'{feedback_path} is shorter than the last update, it is read from the start.')
+            progress.update(offset=0)
+
+        vectorizer = model.named_steps['vectorizer']
+        classifier = model.named_steps['model']
+        classes = np.arange(len(enc.classes_))
+        labels = [str(label) for label in enc.classes_]
+        started_at = time.perf_counter()
+        rows = progress['rows']
+        batch = []
+
+        def apply(batch):
+            texts = [self._text_preprocessor.nlp_tokens(text) for _, text, _ in batch if text is not None]
+            targets = enc.transform([label for _, text, label in batch if text is not None])
+            if len(texts) > 0:
+                classifier.partial_fit(vectorizer.transform(texts), targets, classes=classes)
+
+            progress['offset'] = batch[-1][0]
+            progress['rows'] += len(texts)
+            progress['skipped'] += len(batch) - len(texts)
+            progress['batches'] += 1
+
+            if progress['batches'] % eval_every == 0:
+                progress['accuracy'] = model.score(testing_set['x'], testing_set['y'])
+                print(f'Held-out accuracy after {progress["batches"]} batches: {progress["accuracy"]:.4f}.')
+
+            # Every mini-batch is checkpointed together with the feedback offset it covers
+            ModelArtifact.export(model, enc, artifact_path, score=progress['accuracy'], metadata=progress)
+
+        for row in self.__read_feedback(feedback_path, progress['offset'], labels):
+            batch.append(row)
+            if len(batch) == batch_size:
+                apply(batch)
+                batch = []
+        if len(batch) > 0:
+            apply(batch)
+
+        new_rows = progress['rows'] - rows
+        if new_rows == 0:
+            print('No new feedback rows.')
+            return progress
+
+        progress['accuracy'] = model.score(testing_set['x'], testing_set['y'])
+        ModelArtifact.export(model, enc, artifact_path, score=progress['accuracy'], metadata=progress)
+        print(f'Updated online model with {new_rows} rows in {time.perf_counter() - started_at:.1f} s '
+              f'({progress["skipped"]} skipped so far), held-out accuracy {progress["accuracy"]:.4f}.')
+
+        return progress
+
     def predict(self, text):
         if self._model is None:
             return None
 
-        prediction = self._model.predict([self._text_preprocessor.nlp_text(text)])
+        prediction = self._model.predict(token_array([self._text_preprocessor.nlp_tokens(text)]))
         return self._enc.inverse_transform(prediction)[0]
 
     @property
@@ -0,0 +1,67 @@
+import os
+import threading
+
+import nltk
+from nltk.corpus import stopwords
+
+
+class NltkResources:
+    RESOURCES = {
+        'stopwords': 'corpora/stopwords',
+        'punkt': 'tokenizers/punkt',
+        'wordnet': 'corpora/wordnet',
+        'omw-1.4': 'corpora/omw-1.4'
+    }
+
+    # Data found locally is always used as is, the network is only touched for missing resources
+    _offline = os.getenv('NLTK_OFFLINE', '0') == '1'
+    _download_dir = None
+    _available = set()
+    _stop_words = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, data_path=None, offline=None):
+        with cls._lock:
+            if data_path is not None:
+                if data_path not in nltk.data.path:
+                    nltk.data.path.append(data_path)
+                cls._download_dir = data_path
+            if offline is not None:
+                cls._offline = offline
+
+    @classmethod
+    def is_available(cls, name):
+        if name in cls._available:
+            return True
+
+        try:
+            nltk.data.find(cls.RESOURCES[name])
+        except LookupError:
+            return False
+
+        cls._available.add(name)
+        return True
+
+    @classmethod
+    def ensure(cls, name):
+        if cls.is_available(name):
+            return True
+
+        if cls._offline:
+            print(f'NLTK resource {name} is missing and downloads are disabled.')
+            return False
+
+        with cls._lock:
+            if cls._download_dir is not None and not os.path.isdir(cls._download_dir):
+                os.makedirs(cls._download_dir)
+            nltk.download(name, download_dir=cls._download_dir, quiet=True)
+
+        return cls.is_available(name)
+
+    @classmethod
+    def stop_words(cls):
+        if cls._stop_words is None:
+            cls.ensure('stopwords')
+            cls._stop_words = frozenset(stopwords.words('english'))
+        return cls._stop_words
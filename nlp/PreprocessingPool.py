@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import queue
+import time
+
+import nltk
+
+from defs import Constants
+from nlp.SpellEngine import SpellEngine
+from nlp.TextPreprocessor import TextPreprocessor
+
+
+def _work(tasks, results, nltk_paths, spell_cache_path):
+    # Everything expensive is set up once per worker, only plain strings and token lists cross the queues
+    nltk.data.path[:] = nltk_paths
+    spell_engine = SpellEngine.configure(cache_path=spell_cache_path, track_new_entries=True)
+    text_preprocessor = TextPreprocessor()
+
+    started_at = time.perf_counter()
+    busy = 0.0
+    rows = 0
+    chunks = 0
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        start, texts = task
+        chunk_started_at = time.perf_counter()
+        tokens = [text_preprocessor.nlp_tokens(text) for text in texts]
+        busy += time.perf_counter() - chunk_started_at
+        rows += len(texts)
+        chunks += 1
+
+        # New corrections travel with their chunk, a long-lived worker may outlast many process() calls
+        results.put(('chunk', start, tokens, spell_engine.take_new_entries()))
+
+    results.put(('done', {
+        'pid': os.getpid(),
+        'rows': rows,
+        'chunks': chunks,
+        'busy_seconds': busy,
+        'utilization': busy / (time.perf_counter() - started_at)
+    }))
+
+
+class PreprocessingPool:
+    def __init__(self, workers=None, chunk_size=Constants.PREPROCESSING_CHUNK_SIZE, spell_cache_path=None):
+        self._workers = workers or multiprocessing.cpu_count()
+        self._chunk_size = chunk_size
+        self._spell_cache_path = spell_cache_path
+        self._stats = None
+
+        self._tasks = None
+        self._results = None
+        self._processes = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def running(self):
+        return len(self._processes) > 0
+
+    def start(self, workers=None):
+        if self.running:
+            return
+
+        self._tasks = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._processes = [
+            multiprocessing.Process(target=_work,
+                                    args=(self._tasks, self._results, list(nltk.data.path), self._spell_cache_path),
+                                    daemon=True)
+            for _ in range(workers or self._workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def close(self):
+        if not self.running:
+            return []
+
+        worker_stats = []
+        try:
+            for _ in self._processes:
+                self._tasks.put(None)
+            while len(worker_stats) < len(self._processes):
+                message = self.__next_result()
+                if message[0] == 'done':
+                    worker_stats.append(message[1])
+        finally:
+            for process in self._processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+            self._tasks = None
+            self._results = None
+
+        if self._stats is not None:
+            self._stats['per_worker'] = worker_stats
+        return worker_stats
+
+    def __next_result(self):
+        while True:
+            try:
+                return self._results.get(timeout=1)
+            except queue.Empty:
+                if any(process.exitcode not in [None, 0] for process in self._processes):
+                    raise RuntimeError('A preprocessing worker exited unexpectedly.')
+
+    def process(self, texts):
+        texts = [str(text) for text in texts]
+
+        # Outside start()/close() the workers only live for this one call
+        owns_workers = not self.running
+        if owns_workers:
+            self.start(workers=min(self._workers, max(len(texts), 1)))
+
+        try:
+            tokens = self.__process(texts)
+        finally:
+            if owns_workers:
+                self.close()
+
+        return tokens
+
+    def __process(self, texts):
+        tokens = [None] * len(texts)
+        started_at = time.perf_counter()
+
+        # Small chunks keep every worker busy until the end, whichever rows turn out to be slow
+        starts = range(0, len(texts), self._chunk_size)
+        for start in starts:
+            self._tasks.put((start, texts[start:start + self._chunk_size]))
+
+        for _ in starts:
+            _, start, chunk_tokens, spell_entries = self.__next_result()
+            tokens[start:start + len(chunk_tokens)] = chunk_tokens
+            SpellEngine.get_instance().merge(spell_entries)
+
+        elapsed = time.perf_counter() - started_at
+        self._stats = {
+            'rows': len(texts),
+            'workers': len(self._processes),
+            'chunk_size': self._chunk_size,
+            'seconds': elapsed,
+            'rows_per_second': len(texts) / elapsed if elapsed else 0.0,
+            'per_worker': []
+        }
+
+        return tokens
+
+    @property
+    def stats(self):
+        return self._stats
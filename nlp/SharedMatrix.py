@@ -0,0 +1,50 @@
+import json
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class SharedMatrix:
+    FORMAT_VERSION = 1
+    MANIFEST_FILE = 'manifest.json'
+    ARRAYS = ['data', 'indices', 'indptr', 'labels']
+
+    @staticmethod
+    def dump(matrix, labels, path):
+        matrix = csr_matrix(matrix)
+        matrix.sort_indices()
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        arrays = dict(zip(SharedMatrix.ARRAYS, [matrix.data, matrix.indices, matrix.indptr, np.asarray(labels)]))
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), array, allow_pickle=False)
+
+        # Written last, a directory without a manifest is an interrupted dump
+        with open(os.path.join(path, SharedMatrix.MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump({
+                'format_version': SharedMatrix.FORMAT_VERSION,
+                'shape': list(matrix.shape),
+                'nnz': int(matrix.nnz),
+                'bytes': sum(int(array.nbytes) for array in arrays.values())
+            }, f)
+
+    @staticmethod
+    def load(path):
+        with open(os.path.join(path, SharedMatrix.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get('format_version') != SharedMatrix.FORMAT_VERSION:
+            raise ValueError(f'Shared matrix {path} was written in an unsupported format.')
+
+        # The arrays stay on disk, joblib sends workers the file and offset of memory mapped arrays instead of
+        # pickling their content, so every worker reads the same pages from the page cache. Slicing out a fold
+        # still copies its rows into the worker.
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+                  for name in SharedMatrix.ARRAYS}
+        matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(manifest['shape']),
+                            copy=False)
+
+        return matrix, arrays['labels']
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from spellchecker import SpellChecker
+
+from defs import Constants
+
+_MISSING = object()
+
+
+class SpellEngine:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, cache_size=Constants.SPELL_CACHE_SIZE, cache_path=None, distance=Constants.SPELL_DISTANCE,
+                 max_word_length=Constants.SPELL_MAX_WORD_LENGTH, track_new_entries=False):
+        self._spell = SpellChecker(distance=distance)
+        self._distance = distance
+        self._max_word_length = max_word_length
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_path = cache_path
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._dirty = False
+        # Only pool workers record their new corrections, nothing would ever drain the list elsewhere
+        self._new_entries = [] if track_new_entries else None
+
+        if cache_path:
+            self.load()
+
+    @classmethod
+    def configure(cls, **kwargs):
+        with cls._instance_lock:
+            cls._instance = cls(**kwargs)
+        return cls._instance
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __lookup(self, word):
+        if word not in self._spell.unknown([word]):
+            return word
+        if self._max_word_length is not None and len(word) > self._max_word_length:
+            return word
+        return self._spell.correction(word)
+
+    def correct(self, word):
+        with self._lock:
+            correction = self._cache.get(word, _MISSING)
+            if correction is not _MISSING:
+                self._cache.move_to_end(word)
+                self._hits += 1
+                return correction
+            self._misses += 1
+
+        correction = self.__lookup(word)
+
+        with self._lock:
+            self._cache[word] = correction
+            if self._new_entries is not None:
+                self._new_entries.append((word, correction))
+            self._dirty = True
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        return correction
+
+    def correct_words(self, words):
+        return [self.correct(word) for word in words]
+
+    def correct_words_cached(self, words):
+        # Cheap variant for overloaded servers, words without a cached correction are kept as they are
+        with self._lock:
+            return [self._cache.get(word, word) for word in words]
+
+    def entries(self):
+        with self._lock:
+            return list(self._cache.items())
+
+    def take_new_entries(self):
+        # Corrections computed here since the last call, long-lived workers hand these back chunk by chunk
+        with self._lock:
+            if self._new_entries is None:
+                return []
+            entries, self._new_entries = self._new_entries, []
+            return entries
+
+    def merge(self, entries):
+        # Corrections made by other processes, words already known here keep their place in the LRU order
+        with self._lock:
+            for word, correction in entries:
+                if word in self._cache:
+                    continue
+                self._cache[word] = correction
+                self._dirty = True
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+    def __cache_config(self):
+        return {
+            'distance': self._distance,
+            'max_word_length': self._max_word_length
+        }
+
+    def load(self):
+        if not self._cache_path or not os.path.isfile(self._cache_path):
+            return
+
+        with open(self._cache_path, 'r', encoding='utf-8') as f:
+            save_obj = json.load(f)
+
+        # Corrections computed with a different cutoff are not interchangeable
+        if save_obj.get('config') != self.__cache_config():
+            return
+
+        with self._lock:
+            for word, correction in save_obj['entries'][-self._cache_size:]:
+                self._cache[word] = correction
+
+    def save(self):
+        if not self._cache_path or not self._dirty:
+            return
+
+        with self._lock:
+            entries = list(self._cache.items())
+            self._dirty = False
+
+        if not os.path.exists(os.path.dirname(self._cache_path)):
+            os.makedirs(os.path.dirname(self._cache_path))
+
+        tmp_path = f'{self._cache_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'config': self.__cache_config(), 'entries': entries}, f)
+        os.replace(tmp_path, self._cache_path)
+
+    @property
+    def config(self):
+        return self.__cache_config()
+
+    @property
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'size': len(self._cache),
+                'max_size': self._cache_size
+            }
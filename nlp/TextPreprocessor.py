@@ -1,102 +1,180 @@
 import re
+import time
 
 import contractions
 import nltk
+import numpy as np
 from nltk import PorterStemmer
-from nltk.corpus import stopwords
-from spellchecker import SpellChecker
+
+from defs import Constants
+from nlp import NltkResources, SpellEngine
+
+
+def identity_tokenizer(text):
+    return text
+
+
+def token_array(token_lists):
+    # Models are fitted on token lists, a plain string would be split into characters by identity_tokenizer. Lists of
+    # equal length would otherwise be stacked into a 2D array.
+    array = np.empty(len(token_lists), dtype=object)
+    for i, tokens in enumerate(token_lists):
+        array[i] = tokens
+    return array
 
 
 class TextPreprocessor:
+    # Bump whenever a step changes its output, so previously preprocessed corpora are not reused
+    PIPELINE_VERSION = 1
+
     def __init__(self):
-        self._stop_words = stopwords.words('english')
+        # Loaded on first use, constructing a preprocessor never touches the nltk data
+        self._stop_words = None
+        self._tokenizer_ready = False
+        self._stage_observer = None
         self._tested_col_tag = None
         self._stemmer = PorterStemmer()
+        # Vocabulary is small next to the traffic, most words are stemmed once and looked up afterwards
+        self._stem_cache = {}
+        self._stem_cache_size = Constants.STEM_CACHE_SIZE
+
+        self._html_tags_pattern = re.compile(r'<.*?>')
+        # Urls, tags, mentions and html characters are cut up to the next whitespace, while punctuation and
+        # non-ascii chars are dropped one run at a time. A lone '@' or '&' is plain punctuation, hence the '*'.
+        self._speech_unrelated_pattern = re.compile(
+            r'https?://\S+|www\.\S+|[@&]\S*|[]!"$%\'()*+,./:;=#?[\\^_`{|}~\x80-\U0010ffff-]+')
+        self._whitespaces_pattern = re.compile(r'\s+')
 
     def __lowercase_text(self, text):
         return str(text).lower()
 
-    def __replace_abbreviation(self, match):
-        if match is None:
-            return ''
-        match = match.group()
-        if type(match) in [str, bytes, bytearray]:
-            return TextPreprocessorUtil.COMMON_ABBREVIATIONS[match]
-        else:
-            return ''
-
     def __transform_abbreviations(self, text):
-        abbr_pattern = re.compile(
-            r'(?<!\w)(' + '|'.join(
-                re.escape(key) for key in TextPreprocessorUtil.COMMON_ABBREVIATIONS.keys()) + r')(?!\w)')
-        return [abbr_pattern.sub(lambda x: self.__replace_abbreviation(x), word) for word in text if
-                word is not None]
-
-    def __remove_speech_unrelated_terms(self, text):
-        text = re.sub(r'<.*?>', '', text)  # html tags
-        text = re.sub(r'https?://\S+|www\.\S+', '', text)  # urls
-        text = re.sub(r'@\S+', '', text)  # tags, mentions
-        text = re.sub(r'&\S+', '', text)  # html characters
-        text = re.sub(r'[^\x00-\x7f]', '', text)  # non-ascii chars
-        return text
+        # Tokens are alphanumeric, so a whole-token lookup matches exactly what a word-bounded regex would
+        return [TextPreprocessorUtil.COMMON_ABBREVIATIONS.get(word, word) for word in text if word is not None]
 
-    def __remove_punctuation_and_special_chars(self, text):
-        text = re.sub(r'[]!"$%&\'()*+,./:;=#@?[\\^_`{|}~-]+', "", text)
+    def __remove_speech_unrelated_terms_and_punctuation(self, text):
+        text = self._html_tags_pattern.sub('', text)
+        text = self._speech_unrelated_pattern.sub('', text)
         return text
 
     def __normalize_whitespaces(self, text):
-        text = re.sub(r'\s+', ' ', text)
+        text = self._whitespaces_pattern.sub(' ', text)
         return text
 
     def __tokenize(self, text):
-        tokens = nltk.word_tokenize(text)
-
-        return list(
-            filter(lambda word: word.isalnum(), tokens)
-        )
+        if not self._tokenizer_ready:
+            self._tokenizer_ready = NltkResources.ensure('punkt')
+        return [word for word in nltk.word_tokenize(text) if word.isalnum()]
 
     def __remove_stopwords(self, text):
-        filtered = filter(lambda word: word not in self._stop_words, text)
-
-        return list(filtered)
+        stop_words = self.stop_words
+        return [word for word in text if word not in stop_words]
 
     def __correct_spellings(self, text):
-        spell = SpellChecker()
-        corrected_text = []
-        misspelled_words = spell.unknown(text)
+        return SpellEngine.get_instance().correct_words(text)
 
-        for word in text:
-            if word in misspelled_words:
-                corrected_text.append(spell.correction(word))
-            else:
-                corrected_text.append(word)
+    def __correct_cached_spellings(self, text):
+        return SpellEngine.get_instance().correct_words_cached(text)
 
-        return corrected_text
+    def __stem(self, word):
+        stem = self._stem_cache.get(word)
+        if stem is None:
+            stem = self._stemmer.stem(word)
+            if len(self._stem_cache) < self._stem_cache_size:
+                self._stem_cache[word] = stem
+        return stem
 
     def __perform_stemming(self, text):
-        text = [self._stemmer.stem(word) for word in text if word is not None]
+        text = [self.__stem(word) for word in text if word is not None]
         return text
 
     def __fix_contractions(self, text):
         text = contractions.fix(text)
         return text
 
-    def nlp_text(self, text):
+    def __normalize_observed(self, text, degraded):
+        correct_spellings = ('correct_spellings_cached', self.__correct_cached_spellings) if degraded \
+            else ('correct_spellings', self.__correct_spellings)
+
+        for stage, step in [
+            ('lowercase', self.__lowercase_text),
+            ('remove_speech_unrelated', self.__remove_speech_unrelated_terms_and_punctuation),
+            ('fix_contractions', self.__fix_contractions),
+            ('normalize_whitespaces', self.__normalize_whitespaces),
+            ('tokenize', self.__tokenize),
+            ('remove_stopwords', self.__remove_stopwords),
+            ('transform_abbreviations', self.__transform_abbreviations),
+            correct_spellings,
+            ('stemming', self.__perform_stemming)
+        ]:
+            started_at = time.perf_counter()
+            text = step(text)
+            self._stage_observer(stage, time.perf_counter() - started_at)
+
+        return text
+
+    def __normalize(self, text, degraded=False):
+        # Timing every stage is opt-in, without an observer the stages run back to back
+        if self._stage_observer is not None:
+            return self.__normalize_observed(text, degraded)
+
         text = self.__lowercase_text(text)
-        text = self.__remove_speech_unrelated_terms(text)
-        text = self.__remove_punctuation_and_special_chars(text)
+        text = self.__remove_speech_unrelated_terms_and_punctuation(text)
         text = self.__fix_contractions(text)
         text = self.__normalize_whitespaces(text)
         text = self.__tokenize(text)
         text = self.__remove_stopwords(text)
         text = self.__transform_abbreviations(text)
-        text = self.__correct_spellings(text)
+        # The degraded profile only applies corrections found earlier, unknown words are never looked up
+        text = self.__correct_cached_spellings(text) if degraded else self.__correct_spellings(text)
         text = self.__perform_stemming(text)
 
-        text = ' '.join(text)
-
         return text
 
+    def nlp_tokens(self, text, degraded=False):
+        return self.__normalize(text, degraded)
+
+    def nlp_text(self, text, degraded=False):
+        return ' '.join(self.__normalize(text, degraded))
+
+    def nlp_batch(self, texts, degraded=False):
+        # Repeated messages are only normalized once, failing ones are returned as None. Token lists are returned since
+        # that is what the models were fitted on
+        normalized = {}
+        batch = []
+
+        for text in texts:
+            if text not in normalized:
+                try:
+                    normalized[text] = self.nlp_tokens(text, degraded)
+                except Exception:
+                    normalized[text] = None
+            batch.append(normalized[text])
+
+        return batch
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = NltkResources.stop_words()
+        return self._stop_words
+
+    @property
+    def config(self):
+        return {
+            'pipeline_version': TextPreprocessor.PIPELINE_VERSION,
+            'stop_words': sorted(self.stop_words),
+            'abbreviations': TextPreprocessorUtil.COMMON_ABBREVIATIONS,
+            'patterns': [pattern.pattern for pattern in [
+                self._html_tags_pattern, self._speech_unrelated_pattern, self._whitespaces_pattern
+            ]],
+            'stemmer': [type(self._stemmer).__name__, self._stemmer.mode],
+            'spell': SpellEngine.get_instance().config
+        }
+
+    def set_stage_observer(self, observer):
+        self._stage_observer = observer
+
     def set_tested_col_tag(self, tag):
         self._tested_col_tag = tag
 
@@ -104,17 +182,7 @@ class TextPreprocessor:
         if self._tested_col_tag is None:
             return df
 
-        df[self._tested_col_tag] = df[self._tested_col_tag] \
-            .map(self.__lowercase_text) \
-            .map(self.__remove_speech_unrelated_terms) \
-            .map(self.__remove_punctuation_and_special_chars) \
-            .map(self.__fix_contractions) \
-            .map(self.__normalize_whitespaces) \
-            .map(self.__tokenize) \
-            .map(self.__remove_stopwords) \
-            .map(self.__transform_abbreviations) \
-            .map(self.__correct_spellings) \
-            .map(self.__perform_stemming)
+        df[self._tested_col_tag] = df[self._tested_col_tag].map(self.__normalize)
 
         return df
 
@@ -1,3 +1,22 @@
-from .InputParser import InputParser
+import importlib
+
+from .SpellEngine import SpellEngine
+from .NltkResources import NltkResources
 from .TextPreprocessor import TextPreprocessor
-from .NLPController import NLPController
+from .HashingTfidfVectorizer import HashingTfidfVectorizer
+from .ModelArtifact import ModelArtifact
+
+# Training only modules pull in pandas, joblib and the model selection code, they are imported on first access
+# so that serving starts without them
+_LAZY_MODULES = ['InputParser', 'CorpusCache', 'PreprocessingPool', 'HalvingSearch', 'NLPController',
+                 'BulkClassifier', 'SharedMatrix']
+
+
+def __getattr__(name):
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    # Importing the submodule binds its name to the module, the class replaces it just like an eager import
+    value = getattr(importlib.import_module(f'.{name}', __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,103 @@
+import csv
+import os
+import re
+
+import contractions
+import nltk
+import pytest
+from nltk import PorterStemmer
+
+from defs import Constants
+from nlp import NltkResources, SpellEngine, TextPreprocessor
+from nlp.TextPreprocessor import TextPreprocessorUtil
+
+# The word-bounded alternation TextPreprocessor used before the whole-token lookup, kept as the reference
+LEGACY_ABBREVIATIONS_PATTERN = re.compile(
+    r'(?<!\w)(' + '|'.join(re.escape(key) for key in TextPreprocessorUtil.COMMON_ABBREVIATIONS.keys()) + r')(?!\w)')
+
+
+def legacy_remove_speech_unrelated_terms_and_punctuation(text):
+    # The five passes the merged _speech_unrelated_pattern replaced, in their original order
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    text = re.sub(r'@\S+', '', text)
+    text = re.sub(r'&\S+', '', text)
+    text = re.sub(r'[^\x00-\x7f]', '', text)
+    return re.sub(r'[]!"$%&\'()*+,./:;=#@?[\\^_`{|}~-]+', '', text)
+
+
+def legacy_transform_abbreviations(tokens):
+    return [LEGACY_ABBREVIATIONS_PATTERN.sub(lambda match: TextPreprocessorUtil.COMMON_ABBREVIATIONS[match.group()],
+                                             word) for word in tokens if word is not None]
+
+
+def legacy_tokens(text, stop_words):
+    text = legacy_remove_speech_unrelated_terms_and_punctuation(str(text).lower())
+    text = re.sub(r'\s+', ' ', contractions.fix(text))
+    tokens = [word for word in nltk.word_tokenize(text) if word.isalnum()]
+    return legacy_transform_abbreviations([word for word in tokens if word not in stop_words])
+
+
+def legacy_nlp_text(text, stop_words, stemmer):
+    # Spelling goes through the same SpellEngine as the current pipeline, only the text steps are compared here
+    tokens = SpellEngine.get_instance().correct_words(legacy_tokens(text, stop_words))
+    return ' '.join(stemmer.stem(word) for word in tokens if word is not None)
+
+
+@pytest.fixture(scope='module', params=Constants.DATASETS, ids=lambda dataset: os.path.basename(dataset['path']))
+def texts(request):
+    with open(request.param['path'], 'r', encoding='utf-8', newline='') as f:
+        texts = [row[Constants.DATASET_X_COL] for row in csv.DictReader(f, delimiter=request.param['delimiter'])]
+
+    assert len(texts) > 0
+    return texts
+
+
+@pytest.fixture(scope='module')
+def nltk_text_preprocessor():
+    # Only data already on disk is used, the tests never download anything
+    NltkResources.configure(data_path=f'{Constants.NLTK_PATH}/nltk_data', offline=True)
+    if not all(NltkResources.is_available(name) for name in ['punkt', 'stopwords']):
+        pytest.skip('The punkt and stopwords NLTK data are needed to tokenize the datasets.')
+
+    SpellEngine.configure(cache_path=Constants.SPELL_CACHE_PATH)
+    return TextPreprocessor()
+
+
+def assert_no_mismatches(texts, expected, actual):
+    mismatches = [row for row in ((text, expected(text), actual(text)) for text in texts) if row[1] != row[2]]
+    assert mismatches == [], f'{len(mismatches)} rows differ, first: {mismatches[0]}'
+
+
+def test_cleanup_matches_legacy_regexes(texts):
+    text_preprocessor = TextPreprocessor()
+
+    assert_no_mismatches(
+        [text.lower() for text in texts],
+        legacy_remove_speech_unrelated_terms_and_punctuation,
+        text_preprocessor._TextPreprocessor__remove_speech_unrelated_terms_and_punctuation
+    )
+
+
+def test_abbreviations_match_legacy_regex(nltk_text_preprocessor, texts):
+    stop_words = nltk_text_preprocessor.stop_words
+    transform = nltk_text_preprocessor._TextPreprocessor__transform_abbreviations
+
+    # Fed with the tokens the abbreviation step sees in the pipeline
+    token_lists = [[word for word in nltk.word_tokenize(re.sub(r'\s+', ' ', contractions.fix(
+        legacy_remove_speech_unrelated_terms_and_punctuation(text.lower())))) if word.isalnum() and
+        word not in stop_words] for text in texts]
+
+    mismatches = [tokens for tokens in token_lists if transform(tokens) != legacy_transform_abbreviations(tokens)]
+    assert mismatches == [], f'{len(mismatches)} rows differ, first: {mismatches[0]}'
+
+
+def test_nlp_text_matches_legacy_pipeline(nltk_text_preprocessor, texts):
+    stop_words = nltk_text_preprocessor.stop_words
+    stemmer = PorterStemmer()
+
+    assert_no_mismatches(
+        texts,
+        lambda text: legacy_nlp_text(text, stop_words, stemmer),
+        nltk_text_preprocessor.nlp_text
+    )